@@ -6,27 +6,49 @@ https://github.com/patsluth/apsystems-api
 """
 import asyncio
 import logging
+import random
 from datetime import timedelta
 
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core_config import Config
 from homeassistant.core import HomeAssistant
+from homeassistant.core import callback
 from homeassistant.exceptions import ConfigEntryNotReady
-from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.storage import STORAGE_DIR
+from homeassistant.helpers.storage import Store
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
 from homeassistant.helpers.update_coordinator import UpdateFailed
 
-from .api import APSystemsApiSystemSummaryClient
+from .api import APSystemsApiFleetClient
+from .backfill import APSystemsApiBackfill
+from .forecast import APSystemsApiForecast
+from .local import APSystemsApiLocalTransport
+from .offload import APSystemsApiWorkStage
 from .coordinator import APSystemsApiSystemSummaryDataUpdateCoordinator
+from .coordinator import async_get_governor
 from .const import CONF_API_APP_ID
 from .const import CONF_API_APP_SECRET
 from .const import CONF_SID
 from .const import CONF_ECU_ID
+from .const import CONF_DAILY_REQUEST_BUDGET
+from .const import DEFAULT_DAILY_REQUEST_BUDGET
+from .const import CONF_INVERTER_TELEMETRY
+from .const import DEFAULT_INVERTER_TELEMETRY
+from .const import CONF_ECU_HOST
 from .const import DOMAIN
 from .const import PLATFORMS
 from .const import STARTUP_MESSAGE
+from .const import STORAGE_VERSION
+from .session import async_acquire_session
+from .session import async_release_session
 
 SCAN_INTERVAL = timedelta(minutes=60)
+# Entries starting from saved data spread their first refresh over this window.
+STARTUP_JITTER = 30
+# Entries without saved data have to wait for their first refresh during setup,
+# so they are only spread over this shorter window.
+FIRST_REFRESH_JITTER = 5
 
 _LOGGER: logging.Logger = logging.getLogger(__package__)
 
@@ -47,53 +69,105 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
     sid = entry.data.get(CONF_SID)
     ecu_id = entry.data.get(CONF_ECU_ID)
 
-    session = async_get_clientsession(hass)
-    client = APSystemsApiSystemSummaryClient(
+    daily_request_budget = entry.options.get(
+        CONF_DAILY_REQUEST_BUDGET, DEFAULT_DAILY_REQUEST_BUDGET
+    )
+    governor, governor_store = await async_get_governor(
+        hass, api_app_id, daily_request_budget
+    )
+
+    session = await async_acquire_session(hass)
+    client = APSystemsApiFleetClient(
         api_app_id=api_app_id,
         api_app_secret=api_app_secret,
-        sid=sid,
-        ecu_id=ecu_id,
+        systems=APSystemsApiFleetClient.parse_systems(sid, ecu_id),
         session=session,
+        governor=governor,
+        inverter_telemetry=entry.options.get(
+            CONF_INVERTER_TELEMETRY, DEFAULT_INVERTER_TELEMETRY
+        ),
+        local_transports=APSystemsApiLocalTransport.parse_hosts(
+            entry.options.get(CONF_ECU_HOST)
+        ),
+        work=APSystemsApiWorkStage(),
     )
 
-    coordinator = APSystemsApiSystemSummaryDataUpdateCoordinator(hass, client=client)
-    await coordinator.async_refresh()
+    forecast = APSystemsApiForecast(
+        hass.config.path(STORAGE_DIR), f"{DOMAIN}.forecast.{entry.entry_id}"
+    )
+    backfill = APSystemsApiBackfill(
+        hass,
+        client,
+        Store(hass, STORAGE_VERSION, f"{DOMAIN}.backfill.{entry.entry_id}"),
+        forecast=forecast,
+    )
+    await backfill.async_load()
+
+    data_store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.data.{entry.entry_id}")
+    coordinator = APSystemsApiSystemSummaryDataUpdateCoordinator(
+        hass,
+        client=client,
+        daily_request_budget=daily_request_budget,
+        governor_store=governor_store,
+        backfill=backfill,
+        data_store=data_store,
+        forecast=forecast,
+    )
 
-    if not coordinator.last_update_success:
-        raise ConfigEntryNotReady
+    restored = client.restore(await data_store.async_load())
+    if restored is not None:
+        # Start from the last good data and refresh in the background, at a random
+        # point of the jitter window so a restart does not fire every entry at once.
+        coordinator.data = restored
 
-    hass.data[DOMAIN][entry.entry_id] = coordinator
+        @callback
+        def _async_first_refresh(_now) -> None:
+            entry.async_create_background_task(
+                hass, coordinator.async_refresh(), name=f"{DOMAIN} refresh"
+            )
 
-    for platform in PLATFORMS:
-        if entry.options.get(platform, True):
-            coordinator.platforms.append(platform)
-            hass.async_add_job(
-                hass.config_entries.async_forward_entry_setup(entry, platform)
+        entry.async_on_unload(
+            async_call_later(
+                hass, random.uniform(0, STARTUP_JITTER), _async_first_refresh
             )
+        )
+    else:
+        await asyncio.sleep(random.uniform(0, FIRST_REFRESH_JITTER))
+        try:
+            await coordinator.async_config_entry_first_refresh()
+        except ConfigEntryNotReady:
+            await async_release_session(hass)
+            raise
+
+    hass.data[DOMAIN][entry.entry_id] = coordinator
 
-    entry.add_update_listener(async_reload_entry)
+    coordinator.platforms.extend(
+        platform for platform in PLATFORMS if entry.options.get(platform, True)
+    )
+    await hass.config_entries.async_forward_entry_setups(
+        entry, coordinator.platforms
+    )
+
+    entry.async_on_unload(entry.add_update_listener(async_reload_entry))
     return True
 
 
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Handle removal of an entry."""
     coordinator = hass.data[DOMAIN][entry.entry_id]
-    unloaded = all(
-        await asyncio.gather(
-            *[
-                hass.config_entries.async_forward_entry_unload(entry, platform)
-                for platform in PLATFORMS
-                if platform in coordinator.platforms
-            ]
-        )
+    unloaded = await hass.config_entries.async_unload_platforms(
+        entry, coordinator.platforms
     )
     if unloaded:
         hass.data[DOMAIN].pop(entry.entry_id)
+        coordinator.async_cancel_backfill()
+        coordinator.client.cache.close()
+        coordinator.client.work.close()
+        await async_release_session(hass)
 
     return unloaded
 
 
 async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
     """Reload config entry."""
-    await async_unload_entry(hass, entry)
-    await async_setup_entry(hass, entry)
+    await hass.config_entries.async_reload(entry.entry_id)
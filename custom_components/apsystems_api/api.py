@@ -5,28 +5,422 @@ import hashlib
 import hmac
 import json
 import logging
+import random
+import time
 import typing
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+from dataclasses import asdict
 from dataclasses import dataclass
+from dataclasses import field
+from functools import partial
+from itertools import accumulate
+from datetime import date
 from datetime import datetime
+from datetime import timedelta
 from urllib.parse import urljoin
+from urllib.parse import urlsplit
 from uuid import uuid4
 import argparse
+import operator
 import os
 import socket
 
 import aiohttp
 import async_timeout
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+from .governor import APSystemsApiRequestGovernor
+from .local import APSystemsApiLocalException
+from .local import APSystemsApiLocalTransport
+from .offload import APSystemsApiWorkStage
+from .offload import OFFLOAD_MIN_BYTES
+
 TIMEOUT = 10
+REFRESH_TIMEOUT = 30
+FLEET_CONCURRENCY = 4
+CACHE_TTLS = {
+    "system_details": 24 * 60 * 60,
+    "system_summary": 30 * 60,
+    "energy_series": 30 * 60,
+}
+# Energy levels of the EMA energy endpoints, coarsest first, with their bucket size.
+ENERGY_LEVELS = {
+    "yearly": timedelta(days=365),
+    "monthly": timedelta(days=28),
+    "daily": timedelta(days=1),
+    "hourly": timedelta(hours=1),
+    "minutely": timedelta(minutes=5),
+}
+ENERGY_TARGET_LEVELS = {
+    "system": ("yearly", "monthly", "daily", "hourly"),
+    "ecu": tuple(ENERGY_LEVELS),
+    "inverter": tuple(ENERGY_LEVELS),
+}
+SERIES_MIN_POINTS = 12
+CACHE_STALE_TTL = 2 * 60 * 60
+RESTORE_MAX_AGE = 24 * 60 * 60
+CACHE_MAX_ENTRIES = 256
+RETRY_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+RETRY_ATTEMPTS = 3
+RETRY_BACKOFF = 0.5
+RETRY_BACKOFF_MAX = 8
+BREAKER_THRESHOLD = 5
+BREAKER_RESET_TIMEOUT = 60
 
 
 _LOGGER: logging.Logger = logging.getLogger(__package__)
 
 
+def _loads(body: bytes) -> typing.Any:
+    """Decode JSON with orjson when it is available (it ships with HA)."""
+    if orjson is not None:
+        return orjson.loads(body)
+    return json.loads(body)
+
+
+def _deltas(values: array) -> typing.List[int]:
+    """Store epoch columns as differences, which are short and mostly equal."""
+    return [value - previous for previous, value in zip([0, *values], values)]
+
+
 class APSystemsApiResponseException(Exception):
     pass
 
 
+class APSystemsApiSchemaException(APSystemsApiResponseException):
+    """The reply does not have the shape the endpoint documents."""
+
+
+class APSystemsApiRequestSkippedException(APSystemsApiResponseException):
+    """The request was not sent, callers may fall back to cached data."""
+
+
+class APSystemsApiBudgetExceededException(APSystemsApiRequestSkippedException):
+    pass
+
+
+class APSystemsApiCircuitOpenException(APSystemsApiRequestSkippedException):
+    pass
+
+
+def _decode(body: bytes, request_path: str) -> typing.Any:
+    """Decode and check a reply, returning its ``data``.
+
+    A plain function of the body, so large replies can be decoded in the work
+    stage, even in a process pool.
+    """
+    try:
+        data = _loads(body)
+    except ValueError as exception:
+        raise APSystemsApiSchemaException(
+            "Invalid JSON from {path}: {exception}".format(
+                path=request_path, exception=exception
+            )
+        ) from exception
+    if not isinstance(data, dict) or "code" not in data:
+        raise APSystemsApiSchemaException(
+            "Unexpected reply from {path}".format(path=request_path)
+        )
+    if data["code"] != 0:
+        raise APSystemsApiResponseException(
+            "Non zero response code: {data}".format(data=json.dumps(data, indent=4))
+        )
+    return data.get("data") or {}
+
+
+class APSystemsApiCircuitBreaker:
+    """Consecutive failure breaker shared by every client of one host.
+
+    After ``threshold`` failures in a row the circuit opens and requests fail fast.
+    Once ``reset_timeout`` has passed a single trial request is let through; its
+    outcome closes the circuit again or re-opens it. A trial that ends without an
+    outcome, such as a cancelled one, is handed back with ``release``.
+    """
+
+    _hosts: typing.Dict[str, "APSystemsApiCircuitBreaker"] = {}
+
+    def __init__(
+        self,
+        host: str,
+        threshold: int = BREAKER_THRESHOLD,
+        reset_timeout: float = BREAKER_RESET_TIMEOUT,
+    ) -> None:
+        self.host = host
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: float | None = None
+        self._trial = False
+
+    @classmethod
+    def for_host(cls, host: str) -> "APSystemsApiCircuitBreaker":
+        if host not in cls._hosts:
+            cls._hosts[host] = cls(host)
+        return cls._hosts[host]
+
+    @property
+    def is_open(self) -> bool:
+        return self.opened_at is not None
+
+    @property
+    def available(self) -> bool:
+        """Whether ``allow`` would let a request through, without claiming it."""
+        return self.opened_at is None or (
+            not self._trial
+            and time.monotonic() - self.opened_at >= self.reset_timeout
+        )
+
+    def allow(self) -> bool:
+        if not self.available:
+            return False
+        if self.opened_at is not None:
+            self._trial = True
+        return True
+
+    def release(self) -> None:
+        """End a trial that had neither a success nor a failure."""
+        self._trial = False
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self._trial = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self._trial or self.failures >= self.threshold:
+            if self.opened_at is None:
+                _LOGGER.warning("Circuit open for %s", self.host)
+            self.opened_at = time.monotonic()
+        self._trial = False
+
+
+class APSystemsApiFanOut:
+    """Run a set of endpoint calls concurrently under one overall deadline.
+
+    Every call is started at the same time, so a refresh costs roughly as much as
+    its slowest call. Results and errors are kept per key, so one failing endpoint
+    does not discard the others.
+    """
+
+    @dataclass
+    class Result:
+        values: typing.Dict[typing.Hashable, typing.Any] = field(default_factory=dict)
+        errors: typing.Dict[typing.Hashable, BaseException] = field(
+            default_factory=dict
+        )
+
+        @property
+        def complete(self) -> bool:
+            return not self.errors
+
+    def __init__(self, timeout: float = REFRESH_TIMEOUT) -> None:
+        self.timeout = timeout
+        self._calls: typing.Dict[
+            typing.Hashable, typing.Callable[[], typing.Awaitable[typing.Any]]
+        ] = {}
+
+    def add(
+        self,
+        key: typing.Hashable,
+        call: typing.Callable[[], typing.Awaitable[typing.Any]],
+    ) -> None:
+        self._calls[key] = call
+
+    async def run(self) -> Result:
+        result = APSystemsApiFanOut.Result()
+        if not self._calls:
+            return result
+
+        tasks = {
+            asyncio.ensure_future(call()): key for key, call in self._calls.items()
+        }
+        try:
+            done, pending = await asyncio.wait(tasks, timeout=self.timeout)
+        finally:
+            # Also when run itself is cancelled, no call outlives it.
+            for task in tasks:
+                task.cancel()
+
+        for task in pending:
+            result.errors[tasks[task]] = asyncio.TimeoutError(
+                "Deadline of {timeout}s exceeded".format(timeout=self.timeout)
+            )
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+        for task in done:
+            key = tasks[task]
+            if task.cancelled():
+                result.errors[key] = asyncio.CancelledError("Call was cancelled")
+            elif (exception := task.exception()) is not None:
+                result.errors[key] = exception
+            else:
+                result.values[key] = task.result()
+
+        return result
+
+
+class APSystemsApiSigner:
+    """HMAC-SHA256 request signing for one EMA app id.
+
+    The secret is encoded and keyed into an HMAC once, and every request signs with
+    a ``copy()`` of it. The constant tail of each signed message (last path segment,
+    method and signature method) is built once per path and method.
+    """
+
+    SIGNATURE_METHOD = "HmacSHA256"
+
+    def __init__(self, api_app_id: str, api_app_secret: str) -> None:
+        self.api_app_id = api_app_id
+        self._hmac = hmac.new(api_app_secret.encode(), digestmod=hashlib.sha256)
+        self._headers = {
+            "Content-type": "application/json; charset=UTF-8",
+            "x-ca-appid": api_app_id,
+            "x-ca-signature-method": self.SIGNATURE_METHOD,
+        }
+        self._suffixes: typing.Dict[typing.Tuple[str, str], str] = {}
+
+    def prepare(self, request_method: str, request_paths: typing.Iterable[str]):
+        for request_path in request_paths:
+            self._suffix(request_method, request_path)
+
+    def _suffix(self, request_method: str, request_path: str) -> str:
+        key = (request_method, request_path)
+        if (suffix := self._suffixes.get(key)) is None:
+            suffix = self._suffixes[key] = "/{app_id}/{segment}/{method}/{sign}".format(
+                app_id=self.api_app_id,
+                segment=request_path.rsplit("/", 1)[-1],
+                method=request_method.upper(),
+                sign=self.SIGNATURE_METHOD,
+            )
+        return suffix
+
+    def headers(self, request_method: str, request_path: str) -> dict:
+        timestamp = str(round(time.time()))
+        nonce = uuid4().hex
+        _hmac = self._hmac.copy()
+        _hmac.update(
+            (timestamp + "/" + nonce + self._suffix(request_method, request_path))
+            .encode()
+        )
+        headers = self._headers.copy()
+        headers["x-ca-timestamp"] = timestamp
+        headers["x-ca-nonce"] = nonce
+        headers["x-ca-signature"] = base64.b64encode(_hmac.digest()).decode()
+        return headers
+
+
+class APSystemsApiResponseCache:
+    """Size bounded LRU of parsed responses with a TTL per endpoint.
+
+    A fresh entry is served as is. A stale one is still served while a background
+    task refetches it, up to ``stale_ttl`` past its TTL; after that the caller waits
+    for the fetch, and gets the stale value back if the fetch fails. Endpoints
+    without a TTL are never cached.
+    """
+
+    @dataclass
+    class Entry:
+        value: typing.Any
+        fetched: float
+
+    ttls: typing.Dict[str, float]
+
+    def __init__(
+        self,
+        ttls: typing.Dict[str, float] | None = None,
+        stale_ttl: float = CACHE_STALE_TTL,
+        max_entries: int = CACHE_MAX_ENTRIES,
+    ) -> None:
+        self.ttls = dict(CACHE_TTLS if ttls is None else ttls)
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[tuple, APSystemsApiResponseCache.Entry]" = (
+            OrderedDict()
+        )
+        self._refreshing: typing.Dict[tuple, asyncio.Task] = {}
+
+    @staticmethod
+    def _key(endpoint: str, request_path: str, params: dict | None) -> tuple:
+        return (endpoint, request_path, tuple(sorted((params or {}).items())))
+
+    def _store(self, key: tuple, value: typing.Any) -> None:
+        self._entries[key] = APSystemsApiResponseCache.Entry(value, time.monotonic())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def get(
+        self,
+        endpoint: str,
+        request_path: str,
+        params: dict | None,
+        fetch: typing.Callable[[], typing.Awaitable[typing.Any]],
+    ) -> typing.Any:
+        ttl = self.ttls.get(endpoint)
+        if not ttl:
+            return await fetch()
+
+        key = self._key(endpoint, request_path, params)
+        entry = self._entries.get(key)
+        if entry is None:
+            value = await fetch()
+            self._store(key, value)
+            return value
+
+        self._entries.move_to_end(key)
+        age = time.monotonic() - entry.fetched
+        if age < ttl:
+            return entry.value
+
+        if age < ttl + self.stale_ttl:
+            if key not in self._refreshing:
+                self._refreshing[key] = asyncio.ensure_future(
+                    self._revalidate(key, fetch)
+                )
+            return entry.value
+
+        try:
+            value = await fetch()
+        except Exception as exception:  # pylint: disable=broad-except
+            _LOGGER.warning(
+                "Serving stale %s after refresh failed - %s", request_path, exception
+            )
+            return entry.value
+        self._store(key, value)
+        return value
+
+    async def _revalidate(
+        self, key: tuple, fetch: typing.Callable[[], typing.Awaitable[typing.Any]]
+    ) -> None:
+        try:
+            self._store(key, await fetch())
+        except Exception as exception:  # pylint: disable=broad-except
+            _LOGGER.warning("Error revalidating %s - %s", key[1], exception)
+        finally:
+            self._refreshing.pop(key, None)
+
+    def invalidate(self, endpoint: str | None = None) -> None:
+        """Drop the entries of ``endpoint``, or every entry."""
+        for key in list(self._entries):
+            if endpoint is None or key[0] == endpoint:
+                del self._entries[key]
+
+    def close(self) -> None:
+        """Cancel background refreshes still in flight."""
+        for task in self._refreshing.values():
+            task.cancel()
+        self._refreshing.clear()
+
+
 class APSystemsApiBase:
     @dataclass
     class SystemSummaryData:
@@ -35,20 +429,505 @@ class APSystemsApiBase:
         year: str
         lifetime: str
 
+        @classmethod
+        def from_payload(cls, payload: dict) -> "APSystemsApiBase.SystemSummaryData":
+            """Build from the reply, ignoring keys this version does not know."""
+            return cls(
+                today=payload["today"],
+                month=payload["month"],
+                year=payload["year"],
+                lifetime=payload["lifetime"],
+            )
+
     @dataclass
+    class Payload:
+        digest: bytes
+        etag: str | None
+        last_modified: str | None
+        value: typing.Any
+
+    @dataclass
+    class SystemDetailsData:
+        sid: str
+        timezone: str | None
+        ecu: typing.List[str]
+
+        @classmethod
+        def from_payload(cls, payload: dict) -> "APSystemsApiBase.SystemDetailsData":
+            return cls(
+                sid=payload["sid"],
+                timezone=payload.get("timezone"),
+                ecu=list(payload.get("ecu") or []),
+            )
+
+    @dataclass(slots=True)
     class ECUMinutelyEnergyData:
-        today: str
-        time: typing.List[str]
-        power: typing.List[int]
-        energy: typing.List[str]
+        """Minutely series of one ECU held as compact typed columns.
+
+        ``time`` holds epoch seconds, ``power`` watts and ``energy`` kWh per sample.
+        """
+
+        @dataclass(slots=True)
+        class Window:
+            time: memoryview
+            power: memoryview
+            energy: memoryview
+
+            def release(self) -> None:
+                self.time.release()
+                self.power.release()
+                self.energy.release()
+
+        today: float
+        time: array
+        power: array
+        energy: array
+
+        @staticmethod
+        def _epoch(midnight: int, value: str) -> int:
+            hour, _, minute = value.partition(":")
+            return midnight + int(hour) * 3600 + int(minute or 0) * 60
+
+        @classmethod
+        def from_payload(
+            cls, day: str, payload: dict
+        ) -> "APSystemsApiBase.ECUMinutelyEnergyData":
+            data = cls(
+                today=0.0, time=array("l"), power=array("d"), energy=array("d")
+            )
+            data.extend(day, payload, 0)
+            return data
+
+        def as_dict(self) -> dict:
+            return {
+                "today": self.today,
+                "time": _deltas(self.time),
+                "power": self.power.tolist(),
+                "energy": self.energy.tolist(),
+            }
+
+        @classmethod
+        def from_dict(cls, data: dict) -> "APSystemsApiBase.ECUMinutelyEnergyData":
+            return cls(
+                today=data["today"],
+                time=array("l", accumulate(data["time"])),
+                power=array("d", data["power"]),
+                energy=array("d", data["energy"]),
+            )
+
+        def extend(self, day: str, payload: dict, start: int) -> None:
+            """Replace everything from sample ``start`` onward with the payload's.
+
+            The new samples are converted straight into typed arrays, which is also
+            the schema check: columns of different lengths or values that are not
+            numbers raise ``APSystemsApiSchemaException`` and leave the record as
+            it was. Keys other than the documented ones are ignored.
+            """
+            time = payload.get("time") or []
+            power = payload.get("power") or []
+            energy = payload.get("energy") or []
+            if not len(time) == len(power) == len(energy):
+                raise APSystemsApiSchemaException(
+                    "Columns of unequal length: time={time} power={power} "
+                    "energy={energy}".format(
+                        time=len(time), power=len(power), energy=len(energy)
+                    )
+                )
+
+            midnight = int(datetime.strptime(day, "%Y-%m-%d").timestamp())
+            try:
+                new_time = array(
+                    "l", [self._epoch(midnight, value) for value in time[start:]]
+                )
+                new_power = array("d", map(float, power[start:]))
+                new_energy = array("d", map(float, energy[start:]))
+                today = float(payload.get("today") or 0)
+            except (TypeError, ValueError) as exception:
+                raise APSystemsApiSchemaException(
+                    "Invalid energy sample: {exception}".format(exception=exception)
+                ) from exception
+
+            del self.time[start:]
+            del self.power[start:]
+            del self.energy[start:]
+            self.time.extend(new_time)
+            self.power.extend(new_power)
+            self.energy.extend(new_energy)
+            self.today = today
+
+        def window(self, start: int, end: int) -> Window:
+            """Return zero-copy views of the samples with ``start <= time < end``.
+
+            The views pin the arrays; release them before the next refresh merges.
+            """
+            lo = bisect_left(self.time, start)
+            hi = bisect_left(self.time, end, lo)
+            return APSystemsApiBase.ECUMinutelyEnergyData.Window(
+                time=memoryview(self.time)[lo:hi],
+                power=memoryview(self.power)[lo:hi],
+                energy=memoryview(self.energy)[lo:hi],
+            )
 
         @property
-        def latest_power(self) -> str:
-            return self.power[-1]
+        def latest_power(self) -> float | None:
+            return self.power[-1] if self.power else None
+
+        @property
+        def latest_energy(self) -> float | None:
+            return self.energy[-1] if self.energy else None
+
+    @dataclass(slots=True)
+    class ECUMinutelyAnalytics:
+        """Day statistics of an ECU series, folded in one sample at a time.
+
+        Every sample but the last is final and folded in exactly once. The last one
+        may still be revised by the API, so it is only combined with the fold when
+        the outputs are computed. A series that starts over resets the fold.
+        """
+
+        peak_power: float | None = None
+        peak_time: int | None = None
+        # kWh integrated from the power samples, and its difference to ``today``.
+        integrated_energy: float = 0.0
+        energy_check: float | None = None
+        start_time: int | None = None
+        end_time: int | None = None
+        average_5min: float | None = None
+        average_15min: float | None = None
+        average_60min: float | None = None
+        # W per minute between the last two samples.
+        ramp_rate: float | None = None
+        _first: int | None = None
+        _count: int = 0
+        # Fold of the final samples: peak, peak time, start, end and energy.
+        _state: tuple = (None, None, None, None, 0.0)
+
+        def update(self, data: "APSystemsApiBase.ECUMinutelyEnergyData") -> None:
+            time, power = data.time, data.power
+            final = len(time) - 1
+            if final < 0 or time[0] != self._first or final < self._count:
+                self._first = time[0] if final >= 0 else None
+                self._count = 0
+                self._state = (None, None, None, None, 0.0)
+            for index in range(self._count, final):
+                self._state = self._fold(time, power, index, self._state)
+            self._count = max(final, 0)
+
+            state = self._state
+            if final >= 0:
+                state = self._fold(time, power, final, state)
+            (
+                self.peak_power,
+                self.peak_time,
+                self.start_time,
+                self.end_time,
+                self.integrated_energy,
+            ) = state
+            if final < 0:
+                self.energy_check = self.ramp_rate = None
+                self.average_5min = self.average_15min = self.average_60min = None
+                return
+            self.energy_check = self.integrated_energy - data.today
+            self.average_5min = self._average(time, power, 5 * 60)
+            self.average_15min = self._average(time, power, 15 * 60)
+            self.average_60min = self._average(time, power, 60 * 60)
+            self.ramp_rate = (
+                (power[-1] - power[-2]) * 60 / (time[-1] - time[-2])
+                if final > 0 and time[-1] > time[-2]
+                else None
+            )
+
+        @staticmethod
+        def _fold(time: array, power: array, index: int, state: tuple) -> tuple:
+            """Return ``state`` with sample ``index`` folded in."""
+            peak, peak_time, start, end, energy = state
+            value = power[index]
+            if peak is None or value > peak:
+                peak, peak_time = value, time[index]
+            if value > 0:
+                start = time[index] if start is None else start
+                end = time[index]
+            if index > 0:
+                hours = (time[index] - time[index - 1]) / 3600
+                energy += (power[index - 1] + value) / 2 * hours / 1000
+            return peak, peak_time, start, end, energy
+
+        @staticmethod
+        def _average(time: array, power: array, seconds: int) -> float:
+            """Mean power of the samples within ``seconds`` of the last one."""
+            lo = bisect_left(time, time[-1] - seconds + 1)
+            return sum(power[lo:]) / (len(time) - lo)
+
+    @dataclass(slots=True)
+    class InverterTelemetryData:
+        """Power of every inverter channel under one ECU for the current day.
+
+        Channels are keyed ``<inverter uid>-<channel>``. Energy is integrated from
+        the 5 minute power samples, so one request per ECU covers both. Every
+        channel is integrated once per record, the first time energy is asked for.
+        """
+
+        time: array
+        channels: typing.Dict[str, array]
+        inverters: typing.Dict[str, typing.Tuple[str, ...]]
+        _energy: typing.Dict[str, float] | None = field(
+            default=None, repr=False, compare=False
+        )
+
+        @staticmethod
+        def _inverters(
+            channels: typing.Iterable[str],
+        ) -> typing.Dict[str, typing.Tuple[str, ...]]:
+            """Group ``<inverter uid>-<channel>`` keys by inverter."""
+            inverters: typing.Dict[str, typing.List[str]] = {}
+            for channel in channels:
+                inverters.setdefault(channel.rpartition("-")[0], []).append(channel)
+            return {uid: tuple(keys) for uid, keys in inverters.items()}
+
+        @classmethod
+        def from_payload(
+            cls, day: str, payload: dict
+        ) -> "APSystemsApiBase.InverterTelemetryData":
+            midnight = int(datetime.strptime(day, "%Y-%m-%d").timestamp())
+            time = array(
+                "l",
+                [
+                    APSystemsApiBase.ECUMinutelyEnergyData._epoch(midnight, value)
+                    for value in payload.get("time") or []
+                ],
+            )
+            channels = {}
+            for channel, values in (payload.get("power") or {}).items():
+                power = array("d", map(float, values))
+                if len(power) != len(time):
+                    raise APSystemsApiSchemaException(
+                        "Channel {channel} has {power} samples for {time} times".format(
+                            channel=channel, power=len(power), time=len(time)
+                        )
+                    )
+                channels[channel] = power
+            return cls(
+                time=time, channels=channels, inverters=cls._inverters(channels)
+            )
+
+        def as_dict(self) -> dict:
+            return {
+                "time": _deltas(self.time),
+                "channels": {
+                    channel: power.tolist() for channel, power in self.channels.items()
+                },
+            }
+
+        @classmethod
+        def from_dict(cls, data: dict) -> "APSystemsApiBase.InverterTelemetryData":
+            channels = {
+                channel: array("d", power)
+                for channel, power in data["channels"].items()
+            }
+            return cls(
+                time=array("l", accumulate(data["time"])),
+                channels=channels,
+                inverters=cls._inverters(channels),
+            )
+
+        def _keys(self, key: str) -> typing.Tuple[str, ...]:
+            """Channels of ``key``, an inverter uid or a single channel."""
+            if key in self.channels:
+                return (key,)
+            return self.inverters.get(key, ())
+
+        def latest_power(self, key: str) -> float | None:
+            keys = self._keys(key)
+            if not keys or not self.time:
+                return None
+            return sum(self.channels[channel][-1] for channel in keys)
+
+        def energy(self, key: str) -> float | None:
+            """Energy (kWh) of the day so far."""
+            keys = self._keys(key)
+            if not keys:
+                return None
+            if self._energy is None:
+                hours = [
+                    (end - start) / 3600
+                    for start, end in zip(self.time, self.time[1:])
+                ]
+                self._energy = {
+                    channel: sum(map(operator.mul, power, hours)) / 1000
+                    for channel, power in self.channels.items()
+                }
+            return sum(self._energy[channel] for channel in keys)
+
+    @dataclass(slots=True)
+    class TimeSeries:
+        """Energy (kWh) per bucket of one level, keyed by bucket start epoch.
+
+        ``power`` (W) is only filled for the minutely level.
+        """
+
+        level: str
+        time: array = field(default_factory=lambda: array("l"))
+        energy: array = field(default_factory=lambda: array("d"))
+        power: array = field(default_factory=lambda: array("d"))
 
         @property
-        def latest_energy(self) -> str:
-            return self.energy[-1]
+        def total(self) -> float:
+            return sum(self.energy)
+
+        def extend(self, other: "APSystemsApiBase.TimeSeries", start: int, end: int):
+            """Append the buckets of ``other`` that start in ``[start, end)``."""
+            lo = bisect_left(other.time, start)
+            hi = bisect_left(other.time, end, lo)
+            self.time.extend(other.time[lo:hi])
+            self.energy.extend(other.energy[lo:hi])
+            if other.power:
+                self.power.extend(other.power[lo:hi])
+
+        @classmethod
+        def from_payload(
+            cls, level: str, period: date, payload: typing.Any
+        ) -> "APSystemsApiBase.TimeSeries":
+            """Parse one period of an energy reply.
+
+            Coarse levels reply with a list of values, or with one list per inverter
+            channel (``e1``, ``e2``...) which are summed. The minutely level replies
+            with ``time``/``t`` and ``energy``/``power`` or per channel columns.
+            """
+            series = cls(level=level)
+            if isinstance(payload, dict):
+                energy = cls._column(payload, "energy", "e")
+                power = cls._column(payload, "power", "p")
+                time = payload.get("time") or payload.get("t")
+            else:
+                energy, power, time = [float(value) for value in payload], [], None
+
+            if level == "yearly":
+                # The yearly reply lists every year up to the current one.
+                period = date(datetime.now().year - len(energy) + 1, 1, 1)
+            if level == "minutely":
+                midnight = int(
+                    datetime(period.year, period.month, period.day).timestamp()
+                )
+                series.time.extend(
+                    APSystemsApiBase.ECUMinutelyEnergyData._epoch(midnight, value)
+                    for value in time or []
+                )
+            else:
+                series.time.extend(
+                    int(cls._bucket_start(level, period, index).timestamp())
+                    for index in range(len(energy))
+                )
+            if len(series.time) != len(energy):
+                raise APSystemsApiSchemaException(
+                    "{level} reply has {time} buckets but {energy} values".format(
+                        level=level, time=len(series.time), energy=len(energy)
+                    )
+                )
+            series.energy.extend(energy)
+            series.power.extend(power)
+            return series
+
+        @staticmethod
+        def _column(payload: dict, key: str, prefix: str) -> typing.List[float]:
+            if key in payload:
+                return [float(value) for value in payload[key]]
+            channels = [
+                values
+                for name, values in payload.items()
+                if name[:1] == prefix and name[1:].isdigit()
+            ]
+            return [sum(map(float, values)) for values in zip(*channels)]
+
+        @staticmethod
+        def _bucket_start(level: str, period: date, index: int) -> datetime:
+            if level == "hourly":
+                return datetime(period.year, period.month, period.day, index)
+            if level == "daily":
+                return datetime(period.year, period.month, period.day) + timedelta(
+                    days=index
+                )
+            if level == "monthly":
+                return datetime(period.year, index + 1, 1)
+            return datetime(period.year + index, 1, 1)
+
+    class ECUMinutelyEnergyDayBuffer:
+        """Minutely samples of one ECU for the current local day.
+
+        The EMA API always returns the whole day, but samples are only ever appended,
+        so each poll merges the tail past what is already held instead of rebuilding
+        the arrays. The last held sample is re-merged because the API may still be
+        filling it in. A new day (local midnight) or a shorter payload resets it.
+        """
+
+        day: str | None
+        data: "APSystemsApiBase.ECUMinutelyEnergyData | None"
+
+        def __init__(self) -> None:
+            self.day = None
+            self.data = None
+
+        def merge(
+            self, day: str, payload: dict
+        ) -> "APSystemsApiBase.ECUMinutelyEnergyData":
+            time = payload.get("time") or []
+
+            if self.data is None or self.day != day or len(time) < len(self.data.time):
+                self.day = day
+                self.data = APSystemsApiBase.ECUMinutelyEnergyData.from_payload(
+                    day, payload
+                )
+                return self.data
+
+            start = max(len(self.data.time) - 1, 0)
+            try:
+                self.data.extend(day, payload, start)
+            except BufferError:
+                # A window still pins the arrays, so they cannot be resized in place.
+                self.data = APSystemsApiBase.ECUMinutelyEnergyData.from_payload(
+                    day, payload
+                )
+            return self.data
+
+        def add_sample(
+            self, day: str, sample_time: int, power: float, today: float
+        ) -> bool:
+            """Append one reading of the ECU's local interface, True if it is new.
+
+            The sample's energy is the growth of today's total since the previous
+            reading. Local readings are kept in their own buffer, their timestamps
+            do not line up with the samples of the EMA API.
+            """
+            if self.data is None or self.day != day:
+                self.day = day
+                self.data = APSystemsApiBase.ECUMinutelyEnergyData.from_payload(
+                    day, {}
+                )
+            data = self.data
+            if data.time and (data.time[-1], data.power[-1], data.today) == (
+                sample_time,
+                power,
+                today,
+            ):
+                return False
+
+            energy = max(today - data.today, 0.0) if data.time else 0.0
+            try:
+                data.time.append(sample_time)
+                data.power.append(power)
+                data.energy.append(energy)
+            except BufferError:
+                # A window still pins the arrays, so they cannot be resized in place.
+                data = self.data = APSystemsApiBase.ECUMinutelyEnergyData(
+                    today=data.today,
+                    time=array("l", data.time[: len(data.energy)]),
+                    power=array("d", data.power[: len(data.energy)]),
+                    energy=array("d", data.energy),
+                )
+                data.time.append(sample_time)
+                data.power.append(power)
+                data.energy.append(energy)
+            data.today = today
+            return True
 
     base_url: str = "https://api.apsystemsema.com:9282"
     api_app_id: str
@@ -56,6 +935,7 @@ class APSystemsApiBase:
     sid: str
     ecu_id: str
     session: aiohttp.ClientSession
+    governor: APSystemsApiRequestGovernor | None
 
     def __init__(
         self,
@@ -64,126 +944,470 @@ class APSystemsApiBase:
         sid: str,
         ecu_id: str,
         session: aiohttp.ClientSession,
+        governor: APSystemsApiRequestGovernor | None = None,
+        work: APSystemsApiWorkStage | None = None,
     ) -> None:
         self.api_app_id = api_app_id
         self.api_app_secret = api_app_secret
         self.sid = sid
         self.ecu_id = ecu_id
         self.session = session
+        self.governor = governor
+        self.work = work
+        self.signer = APSystemsApiSigner(api_app_id, api_app_secret)
+        self.signer.prepare("GET", self._request_paths(sid, ecu_id))
+        self.cache = APSystemsApiResponseCache()
+        self.changes = 0
+        self._in_flight: typing.Dict[tuple, asyncio.Future] = {}
+        self._payloads: "OrderedDict[tuple, APSystemsApiBase.Payload]" = OrderedDict()
+        self._ecu_energy_buffers: typing.Dict[
+            str, APSystemsApiBase.ECUMinutelyEnergyDayBuffer
+        ] = {}
 
-    def _hmac_sha256(self, key: str, message: str) -> str:
-        _hmac = hmac.new(key.encode(), message.encode(), hashlib.sha256)
-        return base64.b64encode(_hmac.digest()).decode("utf-8")
-
-    def _request_headers(self, request_method: str, request_path: str) -> str:
-        X_CA_AppId = self.api_app_id
-        X_CA_Timestamp = f"{int(round(datetime.now().timestamp()))}"
-        X_CA_Nonce = uuid4().hex
-        X_CA_Signature_Method = "HmacSHA256"
-        X_CA_Signature = self._hmac_sha256(
-            self.api_app_secret,
-            "/".join(
-                [
-                    X_CA_Timestamp,
-                    X_CA_Nonce,
-                    X_CA_AppId,
-                    request_path.split("/")[-1],
-                    request_method.upper(),
-                    X_CA_Signature_Method,
-                ]
-            ),
-        )
-
-        return {
-            "Content-type": "application/json; charset=UTF-8",
-            "x-ca-appid": X_CA_AppId,
-            "x-ca-timestamp": X_CA_Timestamp,
-            "x-ca-nonce": X_CA_Nonce,
-            "x-ca-signature-method": X_CA_Signature_Method,
-            "x-ca-signature": X_CA_Signature,
-        }
+    def _request_headers(self, request_method: str, request_path: str) -> dict:
+        return self.signer.headers(request_method, request_path)
 
     async def _request(
-        self, method: str, url: str, data: dict = {}, headers: dict = {}
+        self,
+        method: str,
+        url: str,
+        data: dict = {},
+        headers: dict | typing.Callable[[], dict] = {},
+        endpoint: str | None = None,
     ) -> aiohttp.ClientResponse:
-        try:
-            # async with async_timeout.timeout(TIMEOUT, loop=asyncio.get_event_loop()):
-            async with async_timeout.timeout(TIMEOUT):
-                if method.lower() == "get":
-                    response = await self.session.get(url, params=data, headers=headers)
-                    response.raise_for_status()
-                    return response
-
-                elif method.lower() == "put":
-                    response = await self.session.put(url, headers=headers, json=data)
-                    response.raise_for_status()
-                    return response
-
-                elif method.lower() == "patch":
-                    response = await self.session.patch(url, headers=headers, json=data)
-                    response.raise_for_status()
-                    return response
-
-                elif method.lower() == "post":
-                    response = await self.session.post(url, headers=headers, json=data)
-                    response.raise_for_status()
-                    return response
-
-        except asyncio.TimeoutError as exception:
-            _LOGGER.error(
-                "Timeout error fetching information from %s - %s",
-                url,
-                exception,
-            )
+        """Send a request, retrying idempotent methods on transient failures.
 
-        except (KeyError, TypeError) as exception:
+        ``headers`` may be a callable so that every attempt is signed afresh. Each
+        attempt is charged to the governor, and the host's circuit breaker fails
+        the request fast while it is open.
+        """
+        endpoint = endpoint or url
+        breaker = APSystemsApiCircuitBreaker.for_host(urlsplit(url).netloc)
+        attempts = RETRY_ATTEMPTS if method.upper() in RETRY_METHODS else 1
+
+        for attempt in range(attempts):
+            if not breaker.available:
+                raise APSystemsApiCircuitOpenException(
+                    "Circuit open for {host}".format(host=breaker.host)
+                )
+            if self.governor is not None and not self.governor.try_acquire(endpoint):
+                raise APSystemsApiBudgetExceededException(
+                    "Request budget exhausted for {endpoint}".format(endpoint=endpoint)
+                )
+
+            trial = breaker.is_open
+            breaker.allow()
+            try:
+                response = await self._send(
+                    method, url, data, headers() if callable(headers) else headers
+                )
+            except aiohttp.ClientResponseError as exception:
+                if exception.status not in RETRY_STATUSES:
+                    breaker.record_success()
+                    _LOGGER.error(
+                        "Error fetching information from %s - %s",
+                        url,
+                        exception,
+                    )
+                    raise
+                breaker.record_failure()
+                failure = exception
+            except (
+                asyncio.TimeoutError,
+                aiohttp.ClientError,
+                socket.gaierror,
+            ) as exception:
+                breaker.record_failure()
+                failure = exception
+            else:
+                breaker.record_success()
+                return response
+            finally:
+                # A trial cancelled or failed in an unexpected way tells nothing
+                # about the host.
+                if trial:
+                    breaker.release()
+
+            if attempt + 1 < attempts:
+                delay = random.uniform(
+                    0, min(RETRY_BACKOFF_MAX, RETRY_BACKOFF * 2**attempt)
+                )
+                _LOGGER.debug(
+                    "Retrying %s in %.2fs after %s", url, delay, repr(failure)
+                )
+                await asyncio.sleep(delay)
+
+        if isinstance(failure, asyncio.TimeoutError):
             _LOGGER.error(
-                "Error parsing information from %s - %s",
+                "Timeout error fetching information from %s - %s",
                 url,
-                exception,
+                failure,
             )
-        except (aiohttp.ClientError, socket.gaierror) as exception:
+        else:
             _LOGGER.error(
                 "Error fetching information from %s - %s",
                 url,
-                exception,
+                failure,
             )
-        except Exception as exception:  # pylint: disable=broad-except
-            _LOGGER.error("Something really wrong happened! - %s", exception)
+        raise failure
+
+    async def _send(
+        self, method: str, url: str, data: dict, headers: dict
+    ) -> aiohttp.ClientResponse:
+        async with async_timeout.timeout(TIMEOUT):
+            if method.lower() == "get":
+                response = await self.session.get(url, params=data, headers=headers)
+            elif method.lower() == "put":
+                response = await self.session.put(url, headers=headers, json=data)
+            elif method.lower() == "patch":
+                response = await self.session.patch(url, headers=headers, json=data)
+            elif method.lower() == "post":
+                response = await self.session.post(url, headers=headers, json=data)
+            else:
+                raise ValueError("Unsupported method {method}".format(method=method))
+            response.raise_for_status()
+            return response
+
+    @staticmethod
+    def _request_paths(sid: str | None, ecu_id: str | None) -> typing.List[str]:
+        """Paths of the endpoints polled for ``sid`` and ``ecu_id``."""
+        if sid is None:
+            return []
+        paths = [
+            "/user/api/v2/systems/details/{sid}".format(sid=sid),
+            "/user/api/v2/systems/summary/{sid}".format(sid=sid),
+        ]
+        if ecu_id is not None:
+            paths.append(
+                "/user/api/v2/systems/{sid}/devices/ecu/energy/{eid}".format(
+                    sid=sid, eid=ecu_id
+                )
+            )
+            paths.append(
+                "/user/api/v2/systems/{sid}/devices/inverter/batch/energy/{eid}".format(
+                    sid=sid, eid=ecu_id
+                )
+            )
+        return paths
+
+    async def _get_data(
+        self,
+        endpoint: str,
+        request_path: str,
+        params: dict | None = None,
+        parse: typing.Callable[[typing.Any], typing.Any] = lambda data: data,
+        offload_parse: bool = False,
+        remember: bool = True,
+    ) -> typing.Any:
+        """Single-flight ``_fetch_data``, concurrent identical GETs share one.
+
+        Callers arriving while the same path and params are in flight wait for that
+        request instead of sending their own, and get its value or its exception.
+        If the caller that sent it is cancelled, the others send it again.
+        """
+        key = (request_path, tuple(sorted((params or {}).items())))
+        while (in_flight := self._in_flight.get(key)) is not None:
+            try:
+                return await asyncio.shield(in_flight)
+            except asyncio.CancelledError:
+                if not in_flight.cancelled() or asyncio.current_task().cancelling():
+                    raise
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            value = await self._fetch_data(
+                key, endpoint, request_path, params, parse, offload_parse, remember
+            )
+        except BaseException as exception:
+            if isinstance(exception, asyncio.CancelledError):
+                future.cancel()
+            else:
+                future.set_exception(exception)
+                # Retrieved here, so a request nobody joined logs no warning.
+                future.exception()
+            raise
+        else:
+            future.set_result(value)
+            return value
+        finally:
+            del self._in_flight[key]
+
+    async def _fetch_data(
+        self,
+        key: tuple,
+        endpoint: str,
+        request_path: str,
+        params: dict | None,
+        parse: typing.Callable[[typing.Any], typing.Any],
+        offload_parse: bool,
+        remember: bool,
+    ) -> typing.Any:
+        """Signed GET of ``request_path``, returning the parsed ``data`` of the reply.
+
+        The last reply of every path and params is remembered, unless ``remember``
+        is False for replies that are not asked for again. Its ETag and
+        Last-Modified are sent back, and a 304 or a byte-identical body returns the
+        previously parsed value without decoding anything.
+
+        Replies of ``OFFLOAD_MIN_BYTES`` or more are decoded in the work stage, and
+        parsed there too when ``offload_parse`` says ``parse`` touches no shared
+        state.
+        """
+        previous = self._payloads.get(key) if remember else None
 
-    async def system_summary(self) -> SystemSummaryData:
-        request_path = "/user/api/v2/systems/summary/{sid}".format(sid=self.sid)
         url = urljoin(self.base_url, request_path)
-        headers = self._request_headers("GET", request_path)
-        response = await self._request("GET", url, headers=headers)
-        data = await response.json()
-        if data["code"] != 0:
-            raise APSystemsApiBase.ResponseException(
-                "Non zero response code: {data}".format(data=json.dumps(data, indent=4))
+
+        def headers() -> dict:
+            headers = self._request_headers("GET", request_path)
+            if previous is not None:
+                if previous.etag:
+                    headers["If-None-Match"] = previous.etag
+                if previous.last_modified:
+                    headers["If-Modified-Since"] = previous.last_modified
+            return headers
+
+        response = await self._request(
+            "GET", url, data=params or {}, headers=headers, endpoint=endpoint
+        )
+        if previous is not None and response.status == 304:
+            response.release()
+            return previous.value
+
+        body = await response.read()
+        digest = hashlib.blake2b(body, digest_size=16).digest()
+        if previous is not None and previous.digest == digest:
+            return previous.value
+
+        offload = self.work is not None and len(body) >= OFFLOAD_MIN_BYTES
+        if offload:
+            data = await self.work.run(_decode, body, request_path)
+        else:
+            data = _decode(body, request_path)
+        try:
+            if offload and offload_parse:
+                value = await self.work.run(parse, data)
+            else:
+                value = parse(data)
+        except (KeyError, TypeError, ValueError) as exception:
+            raise APSystemsApiSchemaException(
+                "Unexpected data from {path}: {exception}".format(
+                    path=request_path, exception=repr(exception)
+                )
+            ) from exception
+
+        self.changes += 1
+        if not remember:
+            return value
+        self._payloads[key] = APSystemsApiBase.Payload(
+            digest=digest,
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
+            value=value,
+        )
+        self._payloads.move_to_end(key)
+        while len(self._payloads) > CACHE_MAX_ENTRIES:
+            self._payloads.popitem(last=False)
+        return value
+
+    async def system_details(self, sid: str | None = None) -> SystemDetailsData:
+        request_path = "/user/api/v2/systems/details/{sid}".format(
+            sid=sid or self.sid
+        )
+
+        async def fetch():
+            return await self._get_data(
+                "system_details",
+                request_path,
+                parse=APSystemsApiBase.SystemDetailsData.from_payload,
             )
-        return APSystemsApiBase.SystemSummaryData(**data["data"])
 
-    async def ecu_minutely_energy(self) -> ECUMinutelyEnergyData:
+        return await self.cache.get("system_details", request_path, None, fetch)
+
+    async def system_summary(self, sid: str | None = None) -> SystemSummaryData:
+        request_path = "/user/api/v2/systems/summary/{sid}".format(
+            sid=sid or self.sid
+        )
+
+        async def fetch():
+            return await self._get_data(
+                "system_summary",
+                request_path,
+                parse=APSystemsApiBase.SystemSummaryData.from_payload,
+            )
+
+        return await self.cache.get("system_summary", request_path, None, fetch)
+
+    async def ecu_minutely_energy(
+        self,
+        sid: str | None = None,
+        ecu_id: str | None = None,
+        day: str | None = None,
+    ) -> ECUMinutelyEnergyData:
+        """Minutely energy of ``day`` (``YYYY-MM-DD``), today by default.
+
+        Today is merged into the ECU's day buffer, past days are parsed on their own.
+        """
+        ecu_id = ecu_id or self.ecu_id
         request_path = "/user/api/v2/systems/{sid}/devices/ecu/energy/{eid}".format(
-            sid=self.sid, eid=self.ecu_id
+            sid=sid or self.sid, eid=ecu_id
         )
-        url = urljoin(self.base_url, request_path)
-        headers = self._request_headers("GET", request_path)
-        response = await self._request(
-            "GET", 
-            url,
-            data=dict(
+        today = datetime.now().strftime("%Y-%m-%d")
+        if day is None or day == today:
+            buffer = self._ecu_energy_buffers.setdefault(
+                ecu_id, APSystemsApiBase.ECUMinutelyEnergyDayBuffer()
+            )
+            day, parse = today, partial(buffer.merge, today)
+        else:
+            parse = partial(APSystemsApiBase.ECUMinutelyEnergyData.from_payload, day)
+        return await self._get_data(
+            "ecu_minutely_energy",
+            request_path,
+            dict(
                 energy_level="minutely",
-                date_range=(datetime.now()).strftime("%Y-%m-%d"),
+                date_range=day,
             ),
-            headers=headers
+            parse=parse,
+            # Merging into the day buffer must stay on the event loop.
+            offload_parse=day != today,
+            # Past days are fetched once, by the backfill.
+            remember=day == today,
         )
-        data = await response.json()
-        if data["code"] != 0:
-            raise APSystemsApiBase.ResponseException(
-                "Non zero response code: {data}".format(data=json.dumps(data, indent=4))
+
+    async def ecu_inverter_telemetry(
+        self, sid: str | None = None, ecu_id: str | None = None
+    ) -> InverterTelemetryData:
+        """Power of every inverter channel under an ECU, in one batch request."""
+        request_path = (
+            "/user/api/v2/systems/{sid}/devices/inverter/batch/energy/{eid}".format(
+                sid=sid or self.sid, eid=ecu_id or self.ecu_id
             )
-        return APSystemsApiBase.ECUMinutelyEnergyData(**data["data"])
+        )
+        day = datetime.now().strftime("%Y-%m-%d")
+        return await self._get_data(
+            "inverter_telemetry",
+            request_path,
+            dict(
+                energy_level="power",
+                date_range=day,
+            ),
+            parse=partial(APSystemsApiBase.InverterTelemetryData.from_payload, day),
+            offload_parse=True,
+        )
+
+    @staticmethod
+    def choose_energy_level(
+        target: str, start: date, end: date, resolution: timedelta | None = None
+    ) -> str:
+        """Pick the coarsest level whose buckets are no larger than ``resolution``.
+
+        Without a resolution, the query is answered with at least
+        ``SERIES_MIN_POINTS`` buckets.
+        """
+        if resolution is None:
+            resolution = (end - start) / SERIES_MIN_POINTS
+        levels = ENERGY_TARGET_LEVELS[target]
+        for level in levels:
+            if ENERGY_LEVELS[level] <= resolution:
+                return level
+        return levels[-1]
+
+    @staticmethod
+    def energy_periods(
+        level: str, start: date, end: date
+    ) -> typing.List[typing.Tuple[str | None, date]]:
+        """The ``date_range`` values (and their first day) covering ``[start, end)``."""
+        periods = []
+        if level in ("minutely", "hourly"):
+            day = start
+            while day < end:
+                periods.append((day.isoformat(), day))
+                day += timedelta(days=1)
+        elif level == "daily":
+            month = start.replace(day=1)
+            while month < end:
+                periods.append((month.strftime("%Y-%m"), month))
+                month = (month + timedelta(days=32)).replace(day=1)
+        elif level == "monthly":
+            for year in range(start.year, (end - timedelta(days=1)).year + 1):
+                periods.append((str(year), date(year, 1, 1)))
+        else:
+            periods.append((None, start.replace(month=1, day=1)))
+        return periods
+
+    def _energy_path(self, target: str, sid: str, target_id: str | None) -> str:
+        if target == "system":
+            return "/user/api/v2/systems/energy/{sid}".format(sid=sid)
+        return "/user/api/v2/systems/{sid}/devices/{target}/energy/{id}".format(
+            sid=sid, target=target, id=target_id
+        )
+
+    async def energy_series(
+        self,
+        start: date,
+        end: date,
+        resolution: timedelta | None = None,
+        target: str = "ecu",
+        target_id: str | None = None,
+        sid: str | None = None,
+        level: str | None = None,
+    ) -> TimeSeries:
+        """Energy of a system, ECU or inverter over ``[start, end)``.
+
+        The coarsest level that satisfies ``resolution`` is used unless ``level``
+        is given, so months of data cost one request per month (daily level) or
+        per year (monthly level) instead of one per day. All periods are fetched
+        concurrently.
+        """
+        sid = sid or self.sid
+        if target == "ecu":
+            target_id = target_id or self.ecu_id
+        level = level or self.choose_energy_level(target, start, end, resolution)
+        request_path = self._energy_path(target, sid, target_id)
+
+        async def fetch(date_range: str | None, period: date):
+            if target == "ecu" and level == "minutely":
+                data = await self.ecu_minutely_energy(sid, target_id, date_range)
+                return APSystemsApiBase.TimeSeries(
+                    level=level,
+                    time=array("l", data.time),
+                    energy=array("d", data.energy),
+                    power=array("d", data.power),
+                )
+
+            params = dict(energy_level=level)
+            if date_range is not None:
+                params["date_range"] = date_range
+
+            async def fetch_period():
+                return await self._get_data(
+                    "energy_series",
+                    request_path,
+                    params,
+                    parse=partial(
+                        APSystemsApiBase.TimeSeries.from_payload, level, period
+                    ),
+                    offload_parse=True,
+                )
+
+            return await self.cache.get(
+                "energy_series", request_path, params, fetch_period
+            )
+
+        fan_out = APSystemsApiFanOut()
+        periods = self.energy_periods(level, start, end)
+        for date_range, period in periods:
+            fan_out.add(period, partial(fetch, date_range, period))
+        result = await fan_out.run()
+        if result.errors:
+            raise next(iter(result.errors.values()))
+
+        series = APSystemsApiBase.TimeSeries(level=level)
+        start_ts = int(datetime(start.year, start.month, start.day).timestamp())
+        end_ts = int(datetime(end.year, end.month, end.day).timestamp())
+        for _, period in periods:
+            series.extend(result.values[period], start_ts, end_ts)
+        return series
 
 # if __name__ == "__main__":
 #     parser = argparse.ArgumentParser()
@@ -213,22 +1437,374 @@ class APSystemsApiSystemSummaryClient(APSystemsApiBase):
         ecu_minutely_energy: APSystemsApiBase.ECUMinutelyEnergyData | None
 
     async def async_get_data(self) -> SystemData:
-        system_data = APSystemsApiSystemSummaryClient.SystemData(
-            system_summary=None,
-            ecu_minutely_energy=None,
+        fan_out = APSystemsApiFanOut()
+        fan_out.add("system_summary", self.system_summary)
+        fan_out.add("ecu_minutely_energy", self.ecu_minutely_energy)
+        result = await fan_out.run()
+
+        for key, exception in result.errors.items():
+            _LOGGER.error(
+                "Error fetching %s %s",
+                key,
+                exception,
+            )
+
+        return APSystemsApiSystemSummaryClient.SystemData(
+            system_summary=result.values.get("system_summary"),
+            ecu_minutely_energy=result.values.get("ecu_minutely_energy"),
         )
-        try:
-            system_data.system_summary = await self.system_summary()
-        except Exception as exception:
+
+
+class APSystemsApiFleetClient(APSystemsApiBase):
+    """Poll several systems and all of their ECUs from one config entry.
+
+    All requests of a refresh share the session and signing credentials and go out
+    as one fan-out, with at most ``concurrency`` requests in flight at a time.
+    """
+
+    @dataclass
+    class FleetData:
+        system_summary: typing.Dict[str, APSystemsApiBase.SystemSummaryData | None]
+        ecu_minutely_energy: typing.Dict[
+            str, APSystemsApiBase.ECUMinutelyEnergyData | None
+        ]
+        inverter_telemetry: typing.Dict[
+            str, APSystemsApiBase.InverterTelemetryData | None
+        ] = field(default_factory=dict)
+        ecu_analytics: typing.Dict[str, APSystemsApiBase.ECUMinutelyAnalytics] = field(
+            default_factory=dict
+        )
+        # Bumped whenever a reply differs from the previous one. Records can be
+        # updated in place, so equal data with an equal revision means no change.
+        revision: int = 0
+        # ECU ids of every system, as discovered when the data was fetched.
+        systems: typing.Dict[str, typing.List[str]] = field(default_factory=dict)
+        # ECUs whose minutely energy was read over the LAN.
+        local: typing.List[str] = field(default_factory=list)
+        # Production forecast per ECU, filled in by the coordinator and not saved.
+        forecasts: typing.Dict[str, typing.Any] = field(default_factory=dict)
+
+        def as_dict(self) -> dict:
+            """Compact JSON-safe form for HA storage."""
+
+            def records(values: dict) -> dict:
+                return {
+                    key: value.as_dict()
+                    for key, value in values.items()
+                    if value is not None
+                }
+
+            return {
+                "saved": time.time(),
+                "system_summary": {
+                    sid: asdict(summary)
+                    for sid, summary in self.system_summary.items()
+                    if summary is not None
+                },
+                "ecu_minutely_energy": records(self.ecu_minutely_energy),
+                "inverter_telemetry": records(self.inverter_telemetry),
+                "revision": self.revision,
+                "systems": self.systems,
+                "local": self.local,
+            }
+
+        @classmethod
+        def from_dict(cls, data: dict) -> "APSystemsApiFleetClient.FleetData":
+            return cls(
+                system_summary={
+                    sid: APSystemsApiBase.SystemSummaryData.from_payload(summary)
+                    for sid, summary in data["system_summary"].items()
+                },
+                ecu_minutely_energy={
+                    ecu_id: APSystemsApiBase.ECUMinutelyEnergyData.from_dict(energy)
+                    for ecu_id, energy in data["ecu_minutely_energy"].items()
+                },
+                inverter_telemetry={
+                    ecu_id: APSystemsApiBase.InverterTelemetryData.from_dict(telemetry)
+                    for ecu_id, telemetry in data["inverter_telemetry"].items()
+                },
+                revision=data["revision"],
+                systems={
+                    sid: list(ecu_ids)
+                    for sid, ecu_ids in data.get("systems", {}).items()
+                },
+                local=list(data.get("local", [])),
+            )
+
+    systems: typing.Dict[str, typing.List[str]]
+
+    def __init__(
+        self,
+        api_app_id: str,
+        api_app_secret: str,
+        systems: typing.Dict[str, typing.List[str]],
+        session: aiohttp.ClientSession,
+        concurrency: int = FLEET_CONCURRENCY,
+        governor: APSystemsApiRequestGovernor | None = None,
+        inverter_telemetry: bool = False,
+        local_transports: typing.List[APSystemsApiLocalTransport] | None = None,
+        work: APSystemsApiWorkStage | None = None,
+    ) -> None:
+        sid = next(iter(systems), None)
+        super().__init__(
+            api_app_id=api_app_id,
+            api_app_secret=api_app_secret,
+            sid=sid,
+            ecu_id=next(iter(systems.get(sid) or []), None),
+            session=session,
+            governor=governor,
+            work=work,
+        )
+        self.systems = {sid: list(ecu_ids) for sid, ecu_ids in systems.items()}
+        self.inverter_telemetry = inverter_telemetry
+        self.local_transports = list(local_transports or [])
+        self._ecu_analytics: typing.Dict[
+            str, APSystemsApiBase.ECUMinutelyAnalytics
+        ] = {}
+        self._local_buffers: typing.Dict[
+            str, APSystemsApiBase.ECUMinutelyEnergyDayBuffer
+        ] = {}
+        # ECUs whose last read came from the LAN, so they cost no EMA requests.
+        self.local_ecus: typing.Set[str] = set()
+        # Refresh counter at which each ECU was last fetched, ECUs that waited
+        # longest go first so a tight budget does not starve the same ones.
+        self._served: typing.Dict[str, int] = {}
+        self._refreshes = 0
+        self.data: APSystemsApiFleetClient.FleetData | None = None
+        self._prepare_signer()
+        self._semaphore = asyncio.Semaphore(concurrency)
+
+    @staticmethod
+    def parse_systems(sids: str, ecu_ids: str) -> typing.Dict[str, typing.List[str]]:
+        """Map comma separated system ids to their ECU ids.
+
+        A single system owns every listed ECU. With several systems the ECUs are
+        discovered from the system details, so ``ecu_ids`` is left unassigned.
+        """
+        sids = [sid.strip() for sid in (sids or "").split(",") if sid.strip()]
+        ecu_ids = [ecu.strip() for ecu in (ecu_ids or "").split(",") if ecu.strip()]
+        if len(sids) == 1:
+            return {sids[0]: ecu_ids}
+        return {sid: [] for sid in sids}
+
+    @property
+    def requests_per_refresh(self) -> int:
+        ecus = {ecu_id for ecu_ids in self.systems.values() for ecu_id in ecu_ids}
+        return (
+            len(self.systems)
+            + len(ecus) * (2 if self.inverter_telemetry else 1)
+            - len(self.local_ecus & ecus)
+        )
+
+    async def _limited(self, call: typing.Callable[[], typing.Awaitable[typing.Any]]):
+        async with self._semaphore:
+            return await call()
+
+    async def async_discover(self) -> None:
+        """Fill in the ECUs of every system that has none configured."""
+        fan_out = APSystemsApiFanOut()
+        for sid, ecu_ids in self.systems.items():
+            if not ecu_ids:
+                fan_out.add(
+                    sid, partial(self._limited, partial(self.system_details, sid))
+                )
+        result = await fan_out.run()
+
+        for sid, exception in result.errors.items():
             _LOGGER.error(
-                "Error fetching system_summary %s",
+                "Error discovering ECUs of system %s %s",
+                sid,
                 exception,
             )
+        for sid, details in result.values.items():
+            self.systems[sid] = details.ecu
+        self._prepare_signer()
+
+    def _prepare_signer(self) -> None:
+        for sid, ecu_ids in self.systems.items():
+            self.signer.prepare("GET", self._request_paths(sid, None))
+            for ecu_id in ecu_ids:
+                self.signer.prepare("GET", self._request_paths(sid, ecu_id))
+
+    def restore(self, data: dict | None) -> FleetData | None:
+        """Adopt data saved by an earlier run, unless it is missing or too old.
+
+        Minutely records of an earlier day are dropped, today's seed the day
+        buffers so the next refresh only merges the new samples. Systems without
+        configured ECUs get the ones discovered back then, so their sensors can be
+        set up before the first refresh.
+        """
+        if not data or time.time() - data.get("saved", 0) > RESTORE_MAX_AGE:
+            return None
         try:
-            system_data.ecu_minutely_energy = await self.ecu_minutely_energy()
-        except Exception as exception:
+            restored = APSystemsApiFleetClient.FleetData.from_dict(data)
+        except (KeyError, TypeError, ValueError) as exception:
+            _LOGGER.warning("Ignoring unreadable saved data %s", exception)
+            return None
+
+        today = datetime.now().strftime("%Y-%m-%d")
+        for records in (restored.ecu_minutely_energy, restored.inverter_telemetry):
+            for key, record in list(records.items()):
+                if not record.time or (
+                    datetime.fromtimestamp(record.time[0]).strftime("%Y-%m-%d")
+                    != today
+                ):
+                    del records[key]
+        for ecu_id, energy in restored.ecu_minutely_energy.items():
+            # LAN readings and EMA replies are kept in buffers of their own.
+            buffers = (
+                self._local_buffers
+                if ecu_id in restored.local
+                else self._ecu_energy_buffers
+            )
+            buffer = buffers.setdefault(
+                ecu_id, APSystemsApiBase.ECUMinutelyEnergyDayBuffer()
+            )
+            buffer.day, buffer.data = today, energy
+
+        for sid, ecu_ids in restored.systems.items():
+            if sid in self.systems and not self.systems[sid]:
+                self.systems[sid] = list(ecu_ids)
+        self._prepare_signer()
+
+        self.changes = restored.revision
+        self._update_analytics(restored)
+        self.data = restored
+        return restored
+
+    async def _async_read_local(
+        self,
+    ) -> typing.Dict[str, APSystemsApiBase.ECUMinutelyEnergyData]:
+        """Read every ECU that has a LAN transport, keyed by the ECU id it reports.
+
+        ECUs that cannot be read are left out and fetched from the EMA API.
+        """
+        readings = await asyncio.gather(
+            *(transport.async_query() for transport in self.local_transports),
+            return_exceptions=True,
+        )
+        now = datetime.now()
+        day = now.strftime("%Y-%m-%d")
+        sample_time = int(now.replace(second=0, microsecond=0).timestamp())
+        local = {}
+        for transport, reading in zip(self.local_transports, readings):
+            if isinstance(reading, APSystemsApiLocalException):
+                _LOGGER.debug(
+                    "Falling back to the EMA API for %s %s", transport.host, reading
+                )
+                continue
+            if isinstance(reading, BaseException):
+                raise reading
+            buffer = self._local_buffers.setdefault(
+                reading.ecu_id, APSystemsApiBase.ECUMinutelyEnergyDayBuffer()
+            )
+            if buffer.add_sample(day, sample_time, reading.power, reading.today):
+                self.changes += 1
+            local[reading.ecu_id] = buffer.data
+        self.local_ecus = set(local)
+        return local
+
+    async def async_get_data(self) -> FleetData:
+        if not all(self.systems.values()):
+            await self.async_discover()
+
+        local = await self._async_read_local() if self.local_transports else {}
+        if self.governor is not None:
+            self.governor.fit_burst(self.requests_per_refresh)
+
+        fan_out = APSystemsApiFanOut()
+        for sid in self.systems:
+            fan_out.add(
+                ("system_summary", sid),
+                partial(self._limited, partial(self.system_summary, sid)),
+            )
+        ecus = sorted(
+            (
+                (sid, ecu_id)
+                for sid, ecu_ids in self.systems.items()
+                for ecu_id in ecu_ids
+            ),
+            key=lambda ecu: self._served.get(ecu[1], -1),
+        )
+        for sid, ecu_id in ecus:
+            if ecu_id not in local:
+                fan_out.add(
+                    ("ecu_minutely_energy", ecu_id),
+                    partial(
+                        self._limited,
+                        partial(self.ecu_minutely_energy, sid, ecu_id),
+                    ),
+                )
+            if self.inverter_telemetry:
+                fan_out.add(
+                    ("inverter_telemetry", ecu_id),
+                    partial(
+                        self._limited,
+                        partial(self.ecu_inverter_telemetry, sid, ecu_id),
+                    ),
+                )
+        result = await fan_out.run()
+        self._refreshes += 1
+        skipped = {
+            key
+            for (_, key), exception in result.errors.items()
+            if isinstance(exception, APSystemsApiBudgetExceededException)
+        }
+        for _, ecu_id in ecus:
+            if ecu_id not in skipped:
+                self._served[ecu_id] = self._refreshes
+
+        for (endpoint, key), exception in result.errors.items():
+            if isinstance(exception, APSystemsApiRequestSkippedException):
+                _LOGGER.debug("Serving cached %s of %s %s", endpoint, key, exception)
+                continue
             _LOGGER.error(
-                "Error fetching ecu_minutely_energy %s",
+                "Error fetching %s of %s %s",
+                endpoint,
+                key,
                 exception,
             )
-        return system_data
+
+        self.data = APSystemsApiFleetClient.FleetData(
+            system_summary={
+                sid: self._value(result, "system_summary", sid)
+                for sid in self.systems
+            },
+            ecu_minutely_energy={
+                ecu_id: local.get(ecu_id)
+                or self._value(result, "ecu_minutely_energy", ecu_id)
+                for ecu_ids in self.systems.values()
+                for ecu_id in ecu_ids
+            },
+            inverter_telemetry={
+                ecu_id: self._value(result, "inverter_telemetry", ecu_id)
+                for ecu_ids in self.systems.values()
+                for ecu_id in ecu_ids
+                if self.inverter_telemetry
+            },
+            revision=self.changes,
+            systems={sid: list(ecu_ids) for sid, ecu_ids in self.systems.items()},
+            local=sorted(local),
+        )
+        self._update_analytics(self.data)
+        return self.data
+
+    def _update_analytics(self, data: FleetData) -> None:
+        """Fold the new samples of every ECU series into its day statistics."""
+        for ecu_id, energy in data.ecu_minutely_energy.items():
+            if energy is not None:
+                analytics = self._ecu_analytics.setdefault(
+                    ecu_id, APSystemsApiBase.ECUMinutelyAnalytics()
+                )
+                analytics.update(energy)
+                data.ecu_analytics[ecu_id] = analytics
+
+    def _value(self, result: APSystemsApiFanOut.Result, endpoint: str, key: str):
+        """Return the fetched value, or the last one if the fetch was held back."""
+        if (endpoint, key) in result.values:
+            return result.values[(endpoint, key)]
+        if self.data is None or not isinstance(
+            result.errors.get((endpoint, key)), APSystemsApiRequestSkippedException
+        ):
+            return None
+        return getattr(self.data, endpoint).get(key)
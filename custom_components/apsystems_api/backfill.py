@@ -0,0 +1,190 @@
+"""Historical backfill of APSystems ECU energy into long-term statistics."""
+import logging
+import typing
+from datetime import date
+from datetime import datetime
+from datetime import timedelta
+
+from homeassistant.components.recorder import get_instance
+from homeassistant.components.recorder.models import StatisticData
+from homeassistant.components.recorder.models import StatisticMetaData
+from homeassistant.components.recorder.statistics import (
+    async_add_external_statistics,
+)
+from homeassistant.components.recorder.statistics import get_last_statistics
+from homeassistant.const import UnitOfEnergy
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+from homeassistant.util import slugify
+
+from .api import APSystemsApiBase
+from .api import APSystemsApiFleetClient
+from .const import DOMAIN
+from .forecast import APSystemsApiForecast
+
+BACKFILL_MAX_DAYS = 30
+BACKFILL_DAYS_PER_RUN = 3
+BACKFILL_BUDGET_RESERVE = 0.5
+BACKFILL_INTERVAL = timedelta(hours=1)
+BACKFILL_SAVE_DELAY = 10
+
+_LOGGER: logging.Logger = logging.getLogger(__package__)
+
+
+def statistic_id(ecu_id: str) -> str:
+    return f"{DOMAIN}:ecu_{slugify(ecu_id)}_energy"
+
+
+def hourly_statistics(
+    data: APSystemsApiBase.ECUMinutelyEnergyData, total: float
+) -> typing.Tuple[typing.List[StatisticData], float]:
+    """Fold one day of samples into hourly rows continuing the running ``total``."""
+    rows: typing.List[StatisticData] = []
+    hour = None
+    for timestamp, energy in zip(data.time, data.energy):
+        start = timestamp - timestamp % 3600
+        if start != hour:
+            if hour is not None:
+                rows.append(_row(hour, total))
+            hour = start
+        total += energy
+    if hour is not None:
+        rows.append(_row(hour, total))
+    return rows, total
+
+
+def _row(hour: int, total: float) -> StatisticData:
+    return StatisticData(
+        start=datetime.fromtimestamp(hour, tz=dt_util.UTC), state=total, sum=total
+    )
+
+
+class APSystemsApiBackfill:
+    """Import completed days of minutely ECU energy as hourly statistics.
+
+    Progress (the last day imported and the running total per ECU) is saved to HA
+    storage, so missing days are found and imported after any downtime and a
+    restart resumes where the last run stopped. ECUs without saved progress pick up
+    after the last hour already in the recorder statistics. A run imports at most
+    ``BACKFILL_DAYS_PER_RUN`` days per ECU, oldest first, and stops while less than
+    ``BACKFILL_BUDGET_RESERVE`` of the day's request quota is left.
+    """
+
+    progress: typing.Dict[str, dict]
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        client: APSystemsApiFleetClient,
+        store: Store,
+        forecast: APSystemsApiForecast | None = None,
+    ) -> None:
+        self.hass = hass
+        self.client = client
+        self.store = store
+        self.forecast = forecast
+        self.progress = {}
+        self._last_run: datetime | None = None
+
+    async def async_load(self) -> None:
+        self.progress = await self.store.async_load() or {}
+
+    def due(self, now: datetime) -> bool:
+        if "recorder" not in self.hass.config.components:
+            return False
+        return self._last_run is None or now - self._last_run >= BACKFILL_INTERVAL
+
+    def missing_days(self, ecu_id: str, today: date) -> typing.List[str]:
+        first = today - timedelta(days=BACKFILL_MAX_DAYS)
+        if (last := self.progress.get(ecu_id, {}).get("day")) is not None:
+            first = max(first, date.fromisoformat(last) + timedelta(days=1))
+        return [
+            (first + timedelta(days=offset)).isoformat()
+            for offset in range((today - first).days)
+        ]
+
+    def _budget_allows(self) -> bool:
+        governor = self.client.governor
+        if governor is None:
+            return True
+        return governor.remaining > governor.daily_budget * BACKFILL_BUDGET_RESERVE
+
+    async def async_run(self) -> None:
+        """Import the next batch of missing days."""
+        self._last_run = dt_util.now()
+        today = self._last_run.date()
+
+        for sid, ecu_ids in self.client.systems.items():
+            for ecu_id in ecu_ids:
+                if ecu_id not in self.progress:
+                    self.progress[ecu_id] = await self._async_last_imported(ecu_id)
+                if not await self._async_backfill_ecu(sid, ecu_id, today):
+                    return
+
+    async def _async_last_imported(self, ecu_id: str) -> dict:
+        """Progress of ``ecu_id`` as recorded by its last statistics row."""
+        statistic = statistic_id(ecu_id)
+        last = await get_instance(self.hass).async_add_executor_job(
+            get_last_statistics, self.hass, 1, statistic, True, {"sum"}
+        )
+        if not (rows := last.get(statistic)):
+            return {}
+        start = dt_util.as_local(dt_util.utc_from_timestamp(rows[0]["start"]))
+        return {"day": start.date().isoformat(), "sum": rows[0]["sum"]}
+
+    async def _async_backfill_ecu(self, sid: str, ecu_id: str, today: date) -> bool:
+        """Backfill one ECU, returning False once the budget runs short."""
+        rows: typing.List[StatisticData] = []
+        progress = dict(self.progress.get(ecu_id, {}))
+        try:
+            for day in self.missing_days(ecu_id, today)[:BACKFILL_DAYS_PER_RUN]:
+                if not self._budget_allows():
+                    _LOGGER.debug("Backfill paused to save request budget")
+                    return False
+                try:
+                    data = await self.client.ecu_minutely_energy(sid, ecu_id, day)
+                    if self.forecast is not None:
+                        await self._async_run_job(self.forecast.add_day, ecu_id, data)
+                except Exception as exception:  # pylint: disable=broad-except
+                    _LOGGER.warning(
+                        "Error backfilling %s of ECU %s - %s", day, ecu_id, exception
+                    )
+                    break
+                day_rows, total = hourly_statistics(data, progress.get("sum", 0.0))
+                rows.extend(day_rows)
+                progress = {"day": day, "sum": total}
+        finally:
+            self._import(ecu_id, rows, progress)
+        return True
+
+    async def _async_run_job(self, func, *args) -> None:
+        if self.client.work is not None:
+            await self.client.work.run(func, *args)
+        else:
+            await self.hass.async_add_executor_job(func, *args)
+
+    def _import(
+        self, ecu_id: str, rows: typing.List[StatisticData], progress: dict
+    ) -> None:
+        """Add the rows of every fetched day in one go and record the progress."""
+        if not progress or progress == self.progress.get(ecu_id):
+            return
+        if rows:
+            async_add_external_statistics(
+                self.hass,
+                StatisticMetaData(
+                    has_mean=False,
+                    has_sum=True,
+                    name=f"ECU {ecu_id} energy",
+                    source=DOMAIN,
+                    statistic_id=statistic_id(ecu_id),
+                    unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
+                ),
+                rows,
+            )
+        self.progress[ecu_id] = progress
+        self.store.async_delay_save(lambda: self.progress, BACKFILL_SAVE_DELAY)
+        _LOGGER.debug(
+            "Backfilled ECU %s up to %s (%s hours)", ecu_id, progress["day"], len(rows)
+        )
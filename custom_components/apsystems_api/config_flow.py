@@ -2,15 +2,21 @@
 import voluptuous as vol
 from homeassistant import config_entries
 from homeassistant.core import callback
-from homeassistant.helpers.aiohttp_client import async_create_clientsession
 
-from .api import APSystemsApiSystemSummaryClient
+from .api import APSystemsApiFleetClient
 from .const import CONF_API_APP_ID
 from .const import CONF_API_APP_SECRET
 from .const import CONF_SID
 from .const import CONF_ECU_ID
+from .const import CONF_DAILY_REQUEST_BUDGET
+from .const import DEFAULT_DAILY_REQUEST_BUDGET
+from .const import CONF_INVERTER_TELEMETRY
+from .const import DEFAULT_INVERTER_TELEMETRY
+from .const import CONF_ECU_HOST
 from .const import DOMAIN
 from .const import PLATFORMS
+from .session import async_acquire_session
+from .session import async_release_session
 
 
 class APSystemsApiFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
@@ -71,19 +77,20 @@ class APSystemsApiFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
         self, api_app_id: str, api_app_secret: str, sid: str, ecu_id: str
     ):
         """Return true if credentials is valid."""
+        session = await async_acquire_session(self.hass)
         try:
-            session = async_create_clientsession(self.hass)
-            client = APSystemsApiSystemSummaryClient(
+            client = APSystemsApiFleetClient(
                 api_app_id=api_app_id,
                 api_app_secret=api_app_secret,
-                sid=sid,
-                ecu_id=ecu_id,
+                systems=APSystemsApiFleetClient.parse_systems(sid, ecu_id),
                 session=session,
             )
             await client.async_get_data()
             return True
         except Exception:  # pylint: disable=broad-except
             pass
+        finally:
+            await async_release_session(self.hass)
         return False
 
 
@@ -109,8 +116,30 @@ class APSystemsApiOptionsFlowHandler(config_entries.OptionsFlow):
             step_id="user",
             data_schema=vol.Schema(
                 {
-                    vol.Required(x, default=self.options.get(x, True)): bool
-                    for x in sorted(PLATFORMS)
+                    **{
+                        vol.Required(x, default=self.options.get(x, True)): bool
+                        for x in sorted(PLATFORMS)
+                    },
+                    vol.Optional(
+                        CONF_DAILY_REQUEST_BUDGET,
+                        description={
+                            "suggested_value": self.options.get(
+                                CONF_DAILY_REQUEST_BUDGET, DEFAULT_DAILY_REQUEST_BUDGET
+                            )
+                        },
+                    ): vol.All(vol.Coerce(int), vol.Range(min=1)),
+                    vol.Required(
+                        CONF_INVERTER_TELEMETRY,
+                        default=self.options.get(
+                            CONF_INVERTER_TELEMETRY, DEFAULT_INVERTER_TELEMETRY
+                        ),
+                    ): bool,
+                    vol.Optional(
+                        CONF_ECU_HOST,
+                        description={
+                            "suggested_value": self.options.get(CONF_ECU_HOST)
+                        },
+                    ): str,
                 }
             ),
         )
@@ -4,6 +4,7 @@ NAME = "APSystems API"
 DOMAIN = "apsystems_api"
 DOMAIN_DATA = f"{DOMAIN}_data"
 VERSION = "1.0.0"
+STORAGE_VERSION = 1
 
 ATTRIBUTION = "Data provided by http://jsonplaceholder.typicode.com/"
 ISSUE_URL = "https://github.com/patsluth/apsystems-api/issues"
@@ -27,9 +28,15 @@ CONF_API_APP_ID = "api_app_id"
 CONF_API_APP_SECRET = "api_app_secret"
 CONF_SID = "sid"
 CONF_ECU_ID = "ecu_id"
+CONF_DAILY_REQUEST_BUDGET = "daily_request_budget"
+CONF_INVERTER_TELEMETRY = "inverter_telemetry"
+CONF_ECU_HOST = "ecu_host"
 
 # Defaults
 DEFAULT_NAME = DOMAIN
+DEFAULT_DAILY_REQUEST_BUDGET = 1000
+# Off by default, it adds a request per ECU to every refresh.
+DEFAULT_INVERTER_TELEMETRY = False
 
 
 STARTUP_MESSAGE = f"""
@@ -1,5 +1,6 @@
 import asyncio
 import logging
+import time
 from datetime import timedelta
 
 from homeassistant.config_entries import ConfigEntry
@@ -7,39 +8,189 @@ from homeassistant.core_config import Config
 from homeassistant.core import HomeAssistant
 from homeassistant.exceptions import ConfigEntryNotReady
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.helpers.debounce import Debouncer
+from homeassistant.helpers.storage import Store
+from homeassistant.helpers.sun import get_astral_event_date
+from homeassistant.helpers.sun import get_astral_event_next
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
 from homeassistant.helpers.update_coordinator import UpdateFailed
+from homeassistant.const import SUN_EVENT_SUNRISE
+from homeassistant.const import SUN_EVENT_SUNSET
+from homeassistant.util import dt as dt_util
 
-from .api import APSystemsApiSystemSummaryClient
+from .api import APSystemsApiFleetClient
+from .backfill import APSystemsApiBackfill
+from .forecast import APSystemsApiForecast
+from .offload import APSystemsApiWorkStageClosedException
 from .const import CONF_API_APP_ID
 from .const import CONF_API_APP_SECRET
 from .const import CONF_SID
 from .const import CONF_ECU_ID
+from .const import DEFAULT_DAILY_REQUEST_BUDGET
 from .const import DOMAIN
+from .const import DOMAIN_DATA
 from .const import PLATFORMS
 from .const import STARTUP_MESSAGE
+from .const import STORAGE_VERSION
+from .governor import APSystemsApiRequestGovernor
+from .scheduler import APSystemsApiPollScheduler
+from .tracing import trace
+from .tracing import trace_enabled
 
 SCAN_INTERVAL = timedelta(minutes=60)
+GOVERNOR_SAVE_DELAY = 60
+DATA_SAVE_DELAY = 60
+REFRESH_COALESCE_WINDOW = 10
 
 _LOGGER: logging.Logger = logging.getLogger(__package__)
 
+
+async def async_get_governor(
+    hass: HomeAssistant, api_app_id: str, daily_request_budget: int
+) -> tuple[APSystemsApiRequestGovernor, Store]:
+    """Return the request governor shared by every entry using ``api_app_id``."""
+    governors = hass.data.setdefault(DOMAIN_DATA, {}).setdefault("governors", {})
+    if api_app_id not in governors:
+        store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.governor.{api_app_id}")
+        governor = APSystemsApiRequestGovernor(daily_request_budget)
+        governor.restore(await store.async_load())
+        governors[api_app_id] = (governor, store)
+
+    governor, store = governors[api_app_id]
+    governor.daily_budget = daily_request_budget
+    return governor, store
+
+
 class APSystemsApiSystemSummaryDataUpdateCoordinator(DataUpdateCoordinator):
     """Class to manage fetching data from the API."""
 
     def __init__(
         self,
         hass: HomeAssistant,
-        client: APSystemsApiSystemSummaryClient,
+        client: APSystemsApiFleetClient,
+        daily_request_budget: int = DEFAULT_DAILY_REQUEST_BUDGET,
+        governor_store: Store | None = None,
+        backfill: APSystemsApiBackfill | None = None,
+        data_store: Store | None = None,
+        forecast: APSystemsApiForecast | None = None,
     ) -> None:
         """Initialize."""
         self.client = client
         self.platforms = []
+        self.scheduler = APSystemsApiPollScheduler(daily_request_budget)
+        self.governor_store = governor_store
+        self.backfill = backfill
+        self.data_store = data_store
+        self.forecast = forecast
+        self._backfill_task: asyncio.Task | None = None
 
-        super().__init__(hass, _LOGGER, name=DOMAIN, update_interval=SCAN_INTERVAL)
+        # Listeners are only called when the fleet data compares unequal, which
+        # the client guarantees by bumping FleetData.revision on any new reply.
+        super().__init__(
+            hass,
+            _LOGGER,
+            name=DOMAIN,
+            update_interval=SCAN_INTERVAL,
+            always_update=False,
+            # Refresh requests from switches, update_entity calls and reloads that
+            # arrive within the window are served by one refresh at its end.
+            request_refresh_debouncer=Debouncer(
+                hass, _LOGGER, cooldown=REFRESH_COALESCE_WINDOW, immediate=False
+            ),
+        )
 
     async def _async_update_data(self):
         """Update data via library."""
+        governor = self.client.governor
+        used = governor.used if governor is not None else 0
         try:
-            return await self.client.async_get_data()
+            data = await self.client.async_get_data()
         except Exception as exception:
-            raise UpdateFailed() from exception
\ No newline at end of file
+            raise UpdateFailed() from exception
+
+        if governor is not None:
+            requests = max(governor.used - used, 0)
+            if self.governor_store is not None:
+                self.governor_store.async_delay_save(
+                    governor.as_dict, GOVERNOR_SAVE_DELAY
+                )
+        else:
+            requests = self.client.requests_per_refresh
+        if trace_enabled():
+            trace("refresh", revision=data.revision, requests=requests)
+
+        if self.data_store is not None:
+            # Restored at the next startup so entities have values right away.
+            self.data_store.async_delay_save(data.as_dict, DATA_SAVE_DELAY)
+
+        if self.forecast is not None:
+            await self._async_update_forecasts(data)
+
+        self._schedule_next(data, requests)
+        self._schedule_backfill()
+        return data
+
+    async def _async_update_forecasts(
+        self, data: APSystemsApiFleetClient.FleetData
+    ) -> None:
+        """Fold the refresh into the forecast engine, off the event loop.
+
+        The forecasts are part of the fleet data, so a new forecast notifies the
+        listeners even when the series did not change.
+        """
+        if self.data is not None:
+            data.forecasts = self.data.forecasts
+        args = (self.forecast.update, dict(data.ecu_minutely_energy), time.time())
+        try:
+            if self.client.work is not None:
+                data.forecasts = await self.client.work.run(*args)
+            else:
+                data.forecasts = await self.hass.async_add_executor_job(*args)
+        except APSystemsApiWorkStageClosedException:
+            # The entry is unloading.
+            return
+        except OSError as exception:
+            _LOGGER.warning("Error updating the production forecast %s", exception)
+
+    def _schedule_backfill(self) -> None:
+        """Start a backfill run in the background when one is due."""
+        if self.backfill is None or not self.backfill.due(dt_util.now()):
+            return
+        if self._backfill_task is not None and not self._backfill_task.done():
+            return
+        self._backfill_task = self.hass.async_create_background_task(
+            self.backfill.async_run(), name=f"{DOMAIN} backfill"
+        )
+
+    def async_cancel_backfill(self) -> None:
+        if self._backfill_task is not None:
+            self._backfill_task.cancel()
+            self._backfill_task = None
+
+    def _schedule_next(
+        self, data: APSystemsApiFleetClient.FleetData, requests: int
+    ) -> None:
+        """Adapt update_interval to the sun and the latest production."""
+        now = dt_util.now()
+        power = [
+            energy.latest_power
+            for energy in data.ecu_minutely_energy.values()
+            if energy is not None and energy.latest_power is not None
+        ]
+        self.scheduler.record(now, requests, sum(power) if power else None)
+
+        sunrise = get_astral_event_date(self.hass, SUN_EVENT_SUNRISE, now.date())
+        sunset = get_astral_event_date(self.hass, SUN_EVENT_SUNSET, now.date())
+        if sunrise is None or sunset is None:
+            # Polar day or night, there is no sun event to plan around.
+            return
+
+        self.update_interval = self.scheduler.next_interval(
+            now,
+            sunrise,
+            sunset,
+            get_astral_event_next(self.hass, SUN_EVENT_SUNRISE, sunset),
+            self.client.requests_per_refresh,
+            local=bool(self.client.local_ecus),
+        )
+        _LOGGER.debug("Next refresh in %s", self.update_interval)
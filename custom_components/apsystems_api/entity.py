@@ -1,4 +1,6 @@
 """APSystemsApiEntity class"""
+from homeassistant.core import callback
+from homeassistant.helpers.device_registry import DeviceInfo
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
 from .const import ATTRIBUTION
@@ -6,27 +8,58 @@ from .const import DOMAIN
 from .const import NAME
 from .const import VERSION
 from .api import APSystemsApiSystemSummaryClient
+from .tracing import trace
+from .tracing import trace_enabled
 
 
 class APSystemsApiEntity(CoordinatorEntity[APSystemsApiSystemSummaryClient]):
     def __init__(self, coordinator, config_entry):
         super().__init__(coordinator)
         self.config_entry = config_entry
+        self._attr_device_info = DeviceInfo(
+            identifiers={(DOMAIN, self.unique_id)},
+            name=NAME,
+            model=VERSION,
+            manufacturer=NAME,
+        )
+
+    def _update_attrs(self) -> None:
+        """Write the ``_attr_*`` fields for the current coordinator data.
+
+        Called once per coordinator update, state writes only read the fields.
+        """
+
+    def _changed(self) -> bool:
+        """Whether the fields differ from the state last written, and remember them.
+
+        Updates that change nothing skip the state write, so the recorder and the
+        event bus only see real changes.
+        """
+        return True
+
+    async def async_added_to_hass(self) -> None:
+        self._update_attrs()
+        self._changed()
+        await super().async_added_to_hass()
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        self._update_attrs()
+        if not self._changed():
+            return
+        if trace_enabled():
+            trace(
+                "entity_update",
+                entity_id=self.entity_id,
+                state=getattr(self, "_attr_native_value", None),
+            )
+        super()._handle_coordinator_update()
 
     # @property
     # def unique_id(self):
     #     """Return a unique ID to use for this entity."""
     #     return self.config_entry.entry_id
 
-    @property
-    def device_info(self):
-        return {
-            "identifiers": {(DOMAIN, self.unique_id)},
-            "name": NAME,
-            "model": VERSION,
-            "manufacturer": NAME,
-        }
-
     @property
     def device_state_attributes(self):
         """Return the state attributes."""
@@ -0,0 +1,232 @@
+"""Production forecast and nowcast from stored APSystems ECU series."""
+import logging
+import os
+import struct
+import threading
+import typing
+from array import array
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import date
+from datetime import datetime
+
+from .api import APSystemsApiBase
+
+SLOT_SECONDS = 5 * 60
+SLOTS = 24 * 60 * 60 // SLOT_SECONDS
+FORECAST_HISTORY_DAYS = 14
+NOWCAST_WINDOW = 60 * 60
+NOWCAST_MAX_FACTOR = 1.5
+
+_LOGGER: logging.Logger = logging.getLogger(__package__)
+
+
+def _midnight(timestamp: int) -> int:
+    return int(
+        datetime.fromtimestamp(timestamp)
+        .replace(hour=0, minute=0, second=0, microsecond=0)
+        .timestamp()
+    )
+
+
+class APSystemsApiForecastIndex:
+    """Power profiles of the last days of one ECU, kept in a small binary file.
+
+    A profile is the power (W) of every ``SLOT_SECONDS`` slot of a day. The file
+    holds up to ``FORECAST_HISTORY_DAYS`` records of a day ordinal followed by the
+    profile as float32, oldest first, about 1 kB per day. Per slot sums and the
+    maximum over all days are kept up to date as days come and go.
+    """
+
+    RECORD = struct.Struct(f"<I{SLOTS}f")
+
+    path: str
+    days: typing.OrderedDict[int, array]
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.days = OrderedDict()
+        self._sum = array("d", bytes(8 * SLOTS))
+        self._envelope = array("d", bytes(8 * SLOTS))
+
+    def load(self) -> None:
+        try:
+            with open(self.path, "rb") as file:
+                content = file.read()
+        except FileNotFoundError:
+            return
+        usable = len(content) - len(content) % self.RECORD.size
+        for ordinal, *profile in self.RECORD.iter_unpack(content[:usable]):
+            self.add(ordinal, array("f", profile))
+
+    def save(self) -> None:
+        """Write every record to a temporary file and swap it in."""
+        temporary = f"{self.path}.tmp"
+        with open(temporary, "wb") as file:
+            for ordinal, profile in self.days.items():
+                file.write(self.RECORD.pack(ordinal, *profile))
+        os.replace(temporary, self.path)
+
+    def add(self, ordinal: int, profile: array) -> None:
+        rebuild = False
+        if ordinal in self.days:
+            self._subtract(self.days.pop(ordinal))
+            rebuild = True
+        self.days[ordinal] = profile
+        self.days = OrderedDict(sorted(self.days.items()))
+        while len(self.days) > FORECAST_HISTORY_DAYS:
+            self._subtract(self.days.popitem(last=False)[1])
+            rebuild = True
+        for slot, power in enumerate(profile):
+            self._sum[slot] += power
+        if rebuild:
+            self._envelope = array(
+                "d", map(max, zip(*self.days.values())) if self.days else []
+            )
+        else:
+            self._envelope = array("d", map(max, self._envelope, profile))
+
+    def _subtract(self, profile: array) -> None:
+        for slot, power in enumerate(profile):
+            self._sum[slot] -= power
+
+    def mean(self, slot: int) -> float:
+        return self._sum[slot] / len(self.days) if self.days else 0.0
+
+    def envelope(self, slot: int) -> float:
+        """Best power seen in ``slot``, the clear-sky ceiling of the forecast."""
+        return self._envelope[slot] if self.days else 0.0
+
+
+class APSystemsApiForecast:
+    """Forecast the rest of the day per ECU from its recent days.
+
+    The baseline of a slot is its mean power over the indexed days, capped by the
+    best power seen in that slot, an empirical clear-sky profile. The nowcast
+    factor scales the baseline by how today's last reported hour compares to it.
+    The API reports with a delay, so the last reported sample, not the clock,
+    marks where today's profile ends and the forecast starts. Today's
+    profile is filled in incrementally and becomes a day of the index once a
+    series of the next day arrives. Every method blocks on file I/O, so they are
+    meant to run in an executor, and a lock keeps concurrent jobs apart.
+    """
+
+    @dataclass(slots=True)
+    class ForecastData:
+        # kWh expected from now on.
+        next_hour: float
+        next_3_hours: float
+        rest_of_day: float
+        nowcast_factor: float
+
+    directory: str
+
+    def __init__(self, directory: str, prefix: str) -> None:
+        self.directory = directory
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._indexes: typing.Dict[str, APSystemsApiForecastIndex] = {}
+        # ECU id to the day ordinal, profile and samples folded of today.
+        self._today: typing.Dict[str, typing.Tuple[int, array, int]] = {}
+
+    def _index(self, ecu_id: str) -> APSystemsApiForecastIndex:
+        if ecu_id not in self._indexes:
+            index = APSystemsApiForecastIndex(
+                os.path.join(self.directory, f"{self.prefix}.{ecu_id}.bin")
+            )
+            index.load()
+            self._indexes[ecu_id] = index
+        return self._indexes[ecu_id]
+
+    @staticmethod
+    def profile(
+        data: APSystemsApiBase.ECUMinutelyEnergyData,
+        profile: array | None = None,
+        start: int = 0,
+    ) -> array:
+        """Fold the samples from ``start`` on into a slot profile of their day."""
+        if profile is None:
+            profile = array("f", bytes(4 * SLOTS))
+        if data.time:
+            midnight = _midnight(data.time[0])
+            for index in range(start, len(data.time)):
+                slot = (data.time[index] - midnight) // SLOT_SECONDS
+                if 0 <= slot < SLOTS:
+                    profile[slot] = data.power[index]
+        return profile
+
+    def add_day(
+        self, ecu_id: str, data: APSystemsApiBase.ECUMinutelyEnergyData
+    ) -> None:
+        """Index a complete past day, such as one fetched by the backfill."""
+        if not data.time:
+            return
+        with self._lock:
+            index = self._index(ecu_id)
+            index.add(date.fromtimestamp(data.time[0]).toordinal(), self.profile(data))
+            index.save()
+
+    def update(
+        self,
+        series: typing.Dict[str, APSystemsApiBase.ECUMinutelyEnergyData | None],
+        now: float,
+    ) -> typing.Dict[str, "APSystemsApiForecast.ForecastData"]:
+        """Fold the new samples of every ECU series in and forecast from ``now``."""
+        forecasts = {}
+        with self._lock:
+            for ecu_id, data in series.items():
+                if data is None or not data.time:
+                    continue
+                profile = self._fold_today(ecu_id, data)
+                last = min(data.time[-1], int(now))
+                forecast = self._forecast(self._index(ecu_id), profile, last)
+                if forecast is not None:
+                    forecasts[ecu_id] = forecast
+        return forecasts
+
+    def _fold_today(
+        self, ecu_id: str, data: APSystemsApiBase.ECUMinutelyEnergyData
+    ) -> array:
+        ordinal = date.fromtimestamp(data.time[0]).toordinal()
+        day, profile, count = self._today.get(ecu_id, (None, None, 0))
+        if day != ordinal:
+            if day is not None and day < ordinal:
+                index = self._index(ecu_id)
+                index.add(day, profile)
+                index.save()
+            profile, count = None, 0
+        # The last sample folded may have been revised since, fold it again.
+        profile = self.profile(data, profile, max(min(count, len(data.time)) - 1, 0))
+        self._today[ecu_id] = (ordinal, profile, len(data.time))
+        return profile
+
+    @staticmethod
+    def _forecast(
+        index: APSystemsApiForecastIndex, profile: array, last: int
+    ) -> "APSystemsApiForecast.ForecastData | None":
+        """Forecast from the slot of ``last``, the last sample of ``profile``."""
+        if not index.days:
+            return None
+        now_slot = min((last - _midnight(last)) // SLOT_SECONDS, SLOTS - 1)
+
+        first = max(now_slot + 1 - NOWCAST_WINDOW // SLOT_SECONDS, 0)
+        window = range(first, now_slot + 1)
+        expected = sum(index.mean(slot) for slot in window)
+        observed = sum(profile[slot] for slot in window)
+        factor = (
+            min(observed / expected, NOWCAST_MAX_FACTOR) if expected > 0 else 1.0
+        )
+
+        def energy(slots: int) -> float:
+            end = min(now_slot + 1 + slots, SLOTS)
+            return sum(
+                min(factor * index.mean(slot), index.envelope(slot))
+                for slot in range(now_slot + 1, end)
+            ) * SLOT_SECONDS / 3600 / 1000
+
+        return APSystemsApiForecast.ForecastData(
+            next_hour=energy(60 * 60 // SLOT_SECONDS),
+            next_3_hours=energy(3 * 60 * 60 // SLOT_SECONDS),
+            rest_of_day=energy(SLOTS),
+            nowcast_factor=factor,
+        )
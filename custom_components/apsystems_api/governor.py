@@ -0,0 +1,95 @@
+"""Request budget governor for the APSystems EMA OpenAPI."""
+import logging
+import time
+import typing
+from datetime import datetime
+
+_LOGGER: logging.Logger = logging.getLogger(__package__)
+
+
+class APSystemsApiRequestGovernor:
+    """Token bucket and daily quota for one EMA app id.
+
+    Tokens refill evenly over the day at ``daily_budget`` per 24 hours and the bucket
+    holds at most ``burst`` of them, so calls are spread across the day instead of
+    being spent in the morning. The burst grows to the largest refresh it has to
+    serve, see ``fit_burst``. Calls are also counted per endpoint and per day, and
+    no call is allowed once the day's quota is used up.
+    """
+
+    daily_budget: int
+    burst: float
+    tokens: float
+    day: str | None
+    counts: typing.Dict[str, int]
+
+    def __init__(self, daily_budget: int, burst: float | None = None) -> None:
+        self.daily_budget = daily_budget
+        self.burst = burst or max(daily_budget / 24, 1.0)
+        self.tokens = self.burst
+        self.day = None
+        self.counts = {}
+        self._updated = time.time()
+
+    @property
+    def used(self) -> int:
+        return sum(self.counts.values())
+
+    @property
+    def remaining(self) -> int:
+        self._roll_over()
+        return max(self.daily_budget - self.used, 0)
+
+    @property
+    def tight(self) -> bool:
+        """Whether the next call would have to wait for budget."""
+        self._refill()
+        return self.tokens < 1 or self.remaining < 1
+
+    def _roll_over(self) -> None:
+        day = datetime.now().date().isoformat()
+        if day != self.day:
+            self.day = day
+            self.counts = {}
+
+    def _refill(self) -> None:
+        now = time.time()
+        rate = self.daily_budget / 86400
+        self.tokens = min(self.burst, self.tokens + (now - self._updated) * rate)
+        self._updated = now
+
+    def fit_burst(self, requests: int) -> None:
+        """Let a full bucket hold every call of a refresh of ``requests`` calls."""
+        self.burst = max(self.burst, float(requests))
+
+    def try_acquire(self, endpoint: str) -> bool:
+        """Take one call of ``endpoint`` out of the budget if there is room."""
+        if self.tight:
+            _LOGGER.debug(
+                "Request budget tight for %s (%.2f tokens, %d left today)",
+                endpoint,
+                self.tokens,
+                self.remaining,
+            )
+            return False
+        self.tokens -= 1
+        self.counts[endpoint] = self.counts.get(endpoint, 0) + 1
+        return True
+
+    def as_dict(self) -> dict:
+        return {
+            "tokens": self.tokens,
+            "updated": self._updated,
+            "day": self.day,
+            "counts": dict(self.counts),
+        }
+
+    def restore(self, data: dict | None) -> None:
+        """Restore the state saved by ``as_dict``."""
+        if not data:
+            return
+        self.tokens = min(float(data.get("tokens", self.burst)), self.burst)
+        self._updated = float(data.get("updated", self._updated))
+        self.day = data.get("day")
+        self.counts = dict(data.get("counts") or {})
+        self._refill()
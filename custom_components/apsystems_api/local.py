@@ -0,0 +1,101 @@
+"""Local LAN transport for APSystems ECU-R and ECU-C gateways."""
+import asyncio
+import logging
+import struct
+from dataclasses import dataclass
+
+import async_timeout
+
+LOCAL_PORT = 8899
+LOCAL_TIMEOUT = 5
+ECU_QUERY = b"APS1100160001END\n"
+FRAME_END = b"END\n"
+FRAME_MIN_LENGTH = 39
+
+_LOGGER: logging.Logger = logging.getLogger(__package__)
+
+
+class APSystemsApiLocalException(Exception):
+    """The ECU could not be reached or sent a reply that cannot be read."""
+
+
+class APSystemsApiLocalTransport:
+    """Reads the ECU summary frame over the ECU's local TCP interface.
+
+    The ECU answers the ``0001`` query with a binary frame: the ECU id as ASCII
+    at 13-25, then 4 byte big-endian lifetime energy (0.1 kWh), current power (W)
+    and today's energy (0.01 kWh). Local reads cost nothing against the EMA
+    quota. The ECU serves one connection at a time, so queries are serialized.
+    """
+
+    @dataclass(slots=True)
+    class ECUData:
+        ecu_id: str
+        lifetime: float
+        power: float
+        today: float
+
+    host: str
+    port: int
+    timeout: float
+
+    def __init__(
+        self, host: str, port: int = LOCAL_PORT, timeout: float = LOCAL_TIMEOUT
+    ) -> None:
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self._lock = asyncio.Lock()
+
+    @staticmethod
+    def parse_hosts(hosts: str | None) -> list:
+        """Transports for a comma separated ``host[:port]`` list."""
+        transports = []
+        for host in (hosts or "").split(","):
+            host, _, port = host.strip().partition(":")
+            if host:
+                transports.append(
+                    APSystemsApiLocalTransport(host, int(port or LOCAL_PORT))
+                )
+        return transports
+
+    @staticmethod
+    def parse_frame(frame: bytes) -> "APSystemsApiLocalTransport.ECUData":
+        if not frame.startswith(b"APS") or len(frame) < FRAME_MIN_LENGTH:
+            raise APSystemsApiLocalException(
+                "Unexpected ECU reply of {length} bytes".format(length=len(frame))
+            )
+        lifetime, power, today = struct.unpack_from(">III", frame, 27)
+        return APSystemsApiLocalTransport.ECUData(
+            ecu_id=frame[13:25].decode("ascii", "replace"),
+            lifetime=lifetime / 10,
+            power=float(power),
+            today=today / 100,
+        )
+
+    async def async_query(self) -> "APSystemsApiLocalTransport.ECUData":
+        async with self._lock:
+            writer = None
+            try:
+                async with async_timeout.timeout(self.timeout):
+                    reader, writer = await asyncio.open_connection(
+                        self.host, self.port
+                    )
+                    writer.write(ECU_QUERY)
+                    await writer.drain()
+                    frame = await reader.readuntil(FRAME_END)
+            except (
+                OSError,
+                asyncio.TimeoutError,
+                asyncio.IncompleteReadError,
+                asyncio.LimitOverrunError,
+            ) as e:
+                raise APSystemsApiLocalException(
+                    "Error reading ECU at {host}:{port} - {exception}".format(
+                        host=self.host, port=self.port, exception=e
+                    )
+                ) from e
+            finally:
+                if writer is not None:
+                    writer.close()
+        return self.parse_frame(frame)
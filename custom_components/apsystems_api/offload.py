@@ -0,0 +1,66 @@
+"""CPU work stage that keeps heavy decoding off the event loop."""
+import asyncio
+import concurrent.futures
+import logging
+import typing
+
+# Replies at least this large are decoded in the work stage.
+OFFLOAD_MIN_BYTES = 64 * 1024
+WORK_MAX_PENDING = 4
+
+_LOGGER: logging.Logger = logging.getLogger(__package__)
+
+
+class APSystemsApiWorkStageClosedException(Exception):
+    """The work stage was closed before the job could finish."""
+
+
+class APSystemsApiWorkStage:
+    """Run CPU bound jobs in a thread executor, with a bounded queue.
+
+    At most ``max_pending`` jobs are queued or running at a time, further callers
+    wait for a slot instead of piling work onto the executor. ``executor`` is a
+    thread pool, None uses the loop's default executor. Jobs such as the forecast
+    update carry locks and other state that cannot be pickled, so process pools
+    are not supported. ``close`` cancels the jobs that have not started yet and
+    refuses new ones, for when the config entry unloads. Callers of those jobs get
+    an ``APSystemsApiWorkStageClosedException``.
+    """
+
+    executor: concurrent.futures.Executor | None
+
+    def __init__(
+        self,
+        executor: concurrent.futures.Executor | None = None,
+        max_pending: int = WORK_MAX_PENDING,
+    ) -> None:
+        self.executor = executor
+        self._semaphore = asyncio.Semaphore(max_pending)
+        self._pending: typing.Set[asyncio.Future] = set()
+        self._closed = False
+
+    async def run(self, func: typing.Callable[..., typing.Any], *args) -> typing.Any:
+        async with self._semaphore:
+            if self._closed:
+                raise APSystemsApiWorkStageClosedException("Work stage is closed")
+            future = asyncio.get_running_loop().run_in_executor(
+                self.executor, func, *args
+            )
+            self._pending.add(future)
+            try:
+                return await future
+            except asyncio.CancelledError:
+                # Only a cancellation by close, not of the calling task itself.
+                if self._closed and not asyncio.current_task().cancelling():
+                    raise APSystemsApiWorkStageClosedException(
+                        "Work stage is closed"
+                    ) from None
+                raise
+            finally:
+                self._pending.discard(future)
+
+    def close(self) -> None:
+        self._closed = True
+        for future in self._pending:
+            future.cancel()
+        self._pending.clear()
@@ -0,0 +1,94 @@
+"""Adaptive polling schedule for APSystems API."""
+import logging
+from collections import deque
+from datetime import datetime
+from datetime import timedelta
+import typing
+
+from .const import DEFAULT_DAILY_REQUEST_BUDGET
+
+FAST_INTERVAL = timedelta(minutes=5)
+LOCAL_INTERVAL = timedelta(seconds=30)
+FLAT_INTERVAL = timedelta(minutes=15)
+MAX_INTERVAL = timedelta(hours=6)
+DAYLIGHT_MARGIN = timedelta(minutes=30)
+FLAT_SAMPLES = 4
+FLAT_THRESHOLD = 0.05
+
+_LOGGER: logging.Logger = logging.getLogger(__package__)
+
+
+class APSystemsApiPollScheduler:
+    """Pick the next update interval from the sun and recent production.
+
+    Polls every ``FAST_INTERVAL`` (the resolution of the minutely series) while the
+    sun is up and output is moving, backs off to ``FLAT_INTERVAL`` when output is
+    flat and sleeps until the next sunrise at night. The interval is stretched so
+    the requests left in the daily budget last until the end of daylight. ECUs read
+    over the LAN are polled every ``LOCAL_INTERVAL`` instead.
+    """
+
+    daily_request_budget: int
+    requests_today: int
+
+    def __init__(self, daily_request_budget: int = DEFAULT_DAILY_REQUEST_BUDGET):
+        self.daily_request_budget = daily_request_budget
+        self.requests_today = 0
+        self._day: str | None = None
+        self._power: typing.Deque[float] = deque(maxlen=FLAT_SAMPLES)
+
+    def record(self, now: datetime, requests: int, power: float | None) -> None:
+        """Account for a finished refresh."""
+        day = now.date().isoformat()
+        if day != self._day:
+            self._day = day
+            self.requests_today = 0
+            self._power.clear()
+        self.requests_today += requests
+        if power is not None:
+            self._power.append(power)
+
+    @property
+    def is_flat(self) -> bool:
+        if len(self._power) < FLAT_SAMPLES:
+            return False
+        peak = max(self._power)
+        return peak - min(self._power) <= max(peak * FLAT_THRESHOLD, 1.0)
+
+    def next_interval(
+        self,
+        now: datetime,
+        sunrise: datetime,
+        sunset: datetime,
+        next_sunrise: datetime,
+        requests_per_refresh: int,
+        local: bool = False,
+    ) -> timedelta:
+        """Return the delay until the next refresh.
+
+        ``sunrise`` and ``sunset`` bound today's daylight, ``next_sunrise`` is the
+        first sunrise after ``sunset``. ``local`` is set when production is read
+        from the ECU's LAN interface, which costs no EMA requests.
+        """
+        start = sunrise - DAYLIGHT_MARGIN
+        end = sunset + DAYLIGHT_MARGIN
+        if now < start:
+            return self._sleep_until(now, start)
+        if now >= end:
+            return self._sleep_until(now, next_sunrise - DAYLIGHT_MARGIN)
+
+        remaining = self.daily_request_budget - self.requests_today
+        refreshes = remaining // max(requests_per_refresh, 1)
+        if refreshes <= 0:
+            _LOGGER.debug("Daily request budget spent, pausing until next sunrise")
+            return self._sleep_until(now, next_sunrise - DAYLIGHT_MARGIN)
+
+        if local:
+            interval = LOCAL_INTERVAL
+        else:
+            interval = FLAT_INTERVAL if self.is_flat else FAST_INTERVAL
+        return min(max((end - now) / refreshes, interval), MAX_INTERVAL)
+
+    @staticmethod
+    def _sleep_until(now: datetime, until: datetime) -> timedelta:
+        return min(max(until - now, FAST_INTERVAL), MAX_INTERVAL)
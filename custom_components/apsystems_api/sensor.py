@@ -4,30 +4,201 @@ from .const import DOMAIN
 from .const import ICON
 from .const import SENSOR
 
-from .const import ATTRIBUTION
 from .const import NAME
 from .const import VERSION
 
 from .entity import APSystemsApiEntity
 import logging
-from homeassistant.const import (
-    STATE_UNAVAILABLE,
-)
-from dataclasses import fields
-from .api import APSystemsApiBase, APSystemsApiSystemSummaryClient
+import typing
+from dataclasses import dataclass
+from datetime import datetime
+from datetime import timedelta
+from .api import APSystemsApiBase, APSystemsApiFleetClient
+from .governor import APSystemsApiRequestGovernor
 from homeassistant.components.sensor import (
     SensorDeviceClass,
-    SensorEntity
+    SensorEntity,
+    SensorEntityDescription,
 )
+from homeassistant.const import UnitOfEnergy
+from homeassistant.const import UnitOfPower
+from homeassistant.helpers import device_registry as dr
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.device_registry import DeviceInfo
+from homeassistant.helpers.entity import EntityCategory
 from homeassistant.helpers.entity import generate_entity_id
+from homeassistant.helpers.typing import StateType
 from homeassistant.core import HomeAssistant
+from homeassistant.core import callback
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.event import async_track_time_interval
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.helpers.typing import DiscoveryInfoType
+from homeassistant.util import dt as dt_util
+
+POWER_DEADBAND = 5.0
+# The request budget changes with every request, not only with fleet data.
+BUDGET_UPDATE_INTERVAL = timedelta(minutes=1)
 
 _LOGGER: logging.Logger = logging.getLogger(__package__)
 
 
+@dataclass(frozen=True, kw_only=True)
+class APSystemsApiSensorEntityDescription(SensorEntityDescription):
+    """Sensor whose value is read from one record of the fleet data."""
+
+    value_fn: typing.Callable[[typing.Any], StateType]
+    # Changes smaller than this are not published, except to and from zero.
+    deadband: float = 0
+
+
+@dataclass(frozen=True, kw_only=True)
+class APSystemsApiInverterSensorEntityDescription(SensorEntityDescription):
+    """Sensor of one inverter or channel, ``value_fn`` gets the telemetry and key."""
+
+    value_fn: typing.Callable[[APSystemsApiBase.InverterTelemetryData, str], StateType]
+    deadband: float = 0
+
+
+def _energy(key: str, value_fn) -> APSystemsApiSensorEntityDescription:
+    return APSystemsApiSensorEntityDescription(
+        key=key,
+        device_class=SensorDeviceClass.ENERGY,
+        native_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
+        icon=ICON,
+        value_fn=value_fn,
+    )
+
+
+SYSTEM_SUMMARY_SENSORS: tuple[APSystemsApiSensorEntityDescription, ...] = (
+    _energy("today", lambda summary: float(summary.today)),
+    _energy("month", lambda summary: float(summary.month)),
+    _energy("year", lambda summary: float(summary.year)),
+    _energy("lifetime", lambda summary: float(summary.lifetime)),
+)
+
+ECU_MINUTELY_ENERGY_SENSORS: tuple[APSystemsApiSensorEntityDescription, ...] = (
+    APSystemsApiSensorEntityDescription(
+        key="latest_power",
+        device_class=SensorDeviceClass.POWER,
+        native_unit_of_measurement=UnitOfPower.WATT,
+        icon=ICON,
+        value_fn=lambda energy: energy.latest_power,
+        deadband=POWER_DEADBAND,
+    ),
+    _energy("latest_energy", lambda energy: energy.latest_energy),
+)
+
+
+def _power(key: str, value_fn, **kwargs) -> APSystemsApiSensorEntityDescription:
+    return APSystemsApiSensorEntityDescription(
+        key=key,
+        device_class=SensorDeviceClass.POWER,
+        native_unit_of_measurement=UnitOfPower.WATT,
+        icon="mdi:chart-bell-curve",
+        value_fn=value_fn,
+        **kwargs,
+    )
+
+
+def _timestamp(key: str, value_fn) -> APSystemsApiSensorEntityDescription:
+    return APSystemsApiSensorEntityDescription(
+        key=key,
+        device_class=SensorDeviceClass.TIMESTAMP,
+        icon="mdi:clock-outline",
+        value_fn=lambda analytics: _datetime(value_fn(analytics)),
+    )
+
+
+def _datetime(timestamp: int | None) -> datetime | None:
+    return None if timestamp is None else dt_util.utc_from_timestamp(timestamp)
+
+
+ECU_ANALYTICS_SENSORS: tuple[APSystemsApiSensorEntityDescription, ...] = (
+    _power("peak_power", lambda analytics: analytics.peak_power),
+    _timestamp("peak_time", lambda analytics: analytics.peak_time),
+    _energy("integrated_energy", lambda analytics: analytics.integrated_energy),
+    _energy("energy_check", lambda analytics: analytics.energy_check),
+    _power(
+        "average_power_5min",
+        lambda analytics: analytics.average_5min,
+        deadband=POWER_DEADBAND,
+    ),
+    _power(
+        "average_power_15min",
+        lambda analytics: analytics.average_15min,
+        deadband=POWER_DEADBAND,
+    ),
+    _power(
+        "average_power_60min",
+        lambda analytics: analytics.average_60min,
+        deadband=POWER_DEADBAND,
+    ),
+    APSystemsApiSensorEntityDescription(
+        key="ramp_rate",
+        native_unit_of_measurement=f"{UnitOfPower.WATT}/min",
+        icon="mdi:trending-up",
+        value_fn=lambda analytics: analytics.ramp_rate,
+    ),
+    _timestamp("production_start", lambda analytics: analytics.start_time),
+    _timestamp("production_end", lambda analytics: analytics.end_time),
+)
+
+FORECAST_SENSORS: tuple[APSystemsApiSensorEntityDescription, ...] = (
+    APSystemsApiSensorEntityDescription(
+        key="forecast_next_hour",
+        device_class=SensorDeviceClass.ENERGY,
+        native_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
+        icon="mdi:solar-power-variant-outline",
+        value_fn=lambda forecast: round(forecast.next_hour, 3),
+    ),
+    APSystemsApiSensorEntityDescription(
+        key="forecast_next_3_hours",
+        device_class=SensorDeviceClass.ENERGY,
+        native_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
+        icon="mdi:solar-power-variant-outline",
+        value_fn=lambda forecast: round(forecast.next_3_hours, 3),
+    ),
+    APSystemsApiSensorEntityDescription(
+        key="forecast_rest_of_day",
+        device_class=SensorDeviceClass.ENERGY,
+        native_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
+        icon="mdi:solar-power-variant-outline",
+        value_fn=lambda forecast: round(forecast.rest_of_day, 3),
+    ),
+    APSystemsApiSensorEntityDescription(
+        key="nowcast_factor",
+        icon="mdi:weather-partly-cloudy",
+        value_fn=lambda forecast: round(forecast.nowcast_factor, 2),
+    ),
+)
+
+INVERTER_SENSORS: tuple[APSystemsApiInverterSensorEntityDescription, ...] = (
+    APSystemsApiInverterSensorEntityDescription(
+        key="latest_power",
+        device_class=SensorDeviceClass.POWER,
+        native_unit_of_measurement=UnitOfPower.WATT,
+        icon="mdi:solar-panel",
+        value_fn=lambda telemetry, key: telemetry.latest_power(key),
+        deadband=POWER_DEADBAND,
+    ),
+    APSystemsApiInverterSensorEntityDescription(
+        key="energy",
+        device_class=SensorDeviceClass.ENERGY,
+        native_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
+        icon="mdi:solar-panel",
+        value_fn=lambda telemetry, key: telemetry.energy(key),
+    ),
+)
+
+REQUEST_BUDGET_SENSOR = APSystemsApiSensorEntityDescription(
+    key="remaining_requests",
+    entity_category=EntityCategory.DIAGNOSTIC,
+    icon="mdi:counter",
+    value_fn=lambda governor: governor.remaining,
+)
+
+
 async def async_setup_entry(
     hass: HomeAssistant,
     config_entry: ConfigEntry,
@@ -35,186 +206,368 @@ async def async_setup_entry(
     discovery_info: DiscoveryInfoType | None = None,
 ) -> None:
     coordinator = hass.data[DOMAIN][config_entry.entry_id]
+    await _async_migrate_legacy_entities(
+        hass, config_entry, coordinator.client.systems
+    )
     system_summary_sensors = [
-        APSystemsApiSystemSummarySensor(coordinator, config_entry, data_key=field.name) 
-        for field in fields(APSystemsApiBase.SystemSummaryData)
+        APSystemsApiSystemSummarySensor(coordinator, config_entry, sid, description)
+        for sid in coordinator.client.systems
+        for description in SYSTEM_SUMMARY_SENSORS
     ]
     ecu_minutely_energy_sensors = [
-        APSystemsApiECUMinutelyEnergyDataSensor(coordinator, config_entry, data_key=field) 
-        for field in ["latest_power", "latest_energy"]
+        APSystemsApiECUMinutelyEnergyDataSensor(
+            coordinator, config_entry, ecu_id, description
+        )
+        for ecu_ids in coordinator.client.systems.values()
+        for ecu_id in ecu_ids
+        for description in ECU_MINUTELY_ENERGY_SENSORS
+    ]
+    ecu_analytics_sensors = [
+        APSystemsApiECUAnalyticsSensor(coordinator, config_entry, ecu_id, description)
+        for ecu_ids in coordinator.client.systems.values()
+        for ecu_id in ecu_ids
+        for description in ECU_ANALYTICS_SENSORS
+    ]
+    forecast_sensors = [
+        APSystemsApiForecastSensor(coordinator, config_entry, ecu_id, description)
+        for ecu_ids in coordinator.client.systems.values()
+        for ecu_id in ecu_ids
+        for description in FORECAST_SENSORS
     ]
 
+    diagnostic_sensors = []
+    if coordinator.client.governor is not None:
+        diagnostic_sensors.append(
+            APSystemsApiRequestBudgetSensor(coordinator, config_entry)
+        )
+
     async_add_entities([
         *system_summary_sensors,
-        *ecu_minutely_energy_sensors
+        *ecu_minutely_energy_sensors,
+        *ecu_analytics_sensors,
+        *forecast_sensors,
+        *diagnostic_sensors,
     ])
 
+    # Inverters and channels are only known once the ECU reports them, so their
+    # sensors are added as they first show up in the batched telemetry.
+    known_channels = set()
+
+    @callback
+    def _async_add_inverter_sensors():
+        data: APSystemsApiFleetClient.FleetData = coordinator.data
+        if data is None:
+            return
+        inverter_sensors = []
+        for ecu_id, telemetry in data.inverter_telemetry.items():
+            if telemetry is None:
+                continue
+            for key in (*telemetry.inverters, *telemetry.channels):
+                if (ecu_id, key) in known_channels:
+                    continue
+                known_channels.add((ecu_id, key))
+                inverter_sensors.extend(
+                    APSystemsApiInverterSensor(
+                        coordinator, config_entry, ecu_id, key, description
+                    )
+                    for description in INVERTER_SENSORS
+                )
+        if inverter_sensors:
+            async_add_entities(inverter_sensors)
+
+    _async_add_inverter_sensors()
+    config_entry.async_on_unload(
+        coordinator.async_add_listener(_async_add_inverter_sensors)
+    )
+
+
+def _legacy_unique_ids(
+    systems: typing.Dict[str, typing.List[str]],
+) -> typing.Dict[str, str]:
+    """Map the unique ids sensors had before fleets to their current ones.
+
+    Those names carried no system or ECU id, so only an entry with a single
+    system and a single ECU can have them.
+    """
+    if len(systems) != 1:
+        return {}
+    ((sid, ecu_ids),) = systems.items()
+    if len(ecu_ids) != 1:
+        return {}
+    owners = {
+        **{description.key: sid for description in SYSTEM_SUMMARY_SENSORS},
+        **{description.key: ecu_ids[0] for description in ECU_MINUTELY_ENERGY_SENSORS},
+    }
+    return {
+        f"None_{DEFAULT_NAME}_{SENSOR}_{key}": (
+            f"None_{DEFAULT_NAME}_{SENSOR}_{owner}_{key}"
+        )
+        for key, owner in owners.items()
+    }
 
-class APSystemsApiSystemSummarySensor(APSystemsApiEntity, SensorEntity):
-    """apsystems_api Sensor class."""
-    data_key: str
 
-    def __init__(self, coordinator, config_entry, data_key: str):
-        self.data_key = data_key
+async def _async_migrate_legacy_entities(
+    hass: HomeAssistant,
+    config_entry: ConfigEntry,
+    systems: typing.Dict[str, typing.List[str]],
+) -> None:
+    """Move registry entries of earlier versions to the current unique ids.
+
+    The entries keep their entity ids and with them their history. The device
+    each of those sensors had of its own is removed.
+    """
+    legacy = _legacy_unique_ids(systems)
+    if not legacy:
+        return
+    entity_registry = er.async_get(hass)
+
+    @callback
+    def _migrate(entry: er.RegistryEntry) -> dict | None:
+        unique_id = legacy.get(entry.unique_id)
+        if unique_id is None or entity_registry.async_get_entity_id(
+            entry.domain, DOMAIN, unique_id
+        ):
+            return None
+        _LOGGER.debug("Migrating %s to unique id %s", entry.entity_id, unique_id)
+        return {"new_unique_id": unique_id, "device_id": None}
+
+    await er.async_migrate_entries(hass, config_entry.entry_id, _migrate)
+
+    device_registry = dr.async_get(hass)
+    for unique_id in legacy:
+        device = device_registry.async_get_device(identifiers={(DOMAIN, unique_id)})
+        if device is not None:
+            device_registry.async_remove_device(device.id)
+
+
+class APSystemsApiSensor(APSystemsApiEntity, SensorEntity):
+    """apsystems_api Sensor class.
+
+    Name, ids and device info are built once here, the value once per coordinator
+    update in ``_update_attrs``. State writes only read ``_attr_*`` fields.
+    """
+
+    entity_description: APSystemsApiSensorEntityDescription
+    _attr_extra_state_attributes: dict | None = None
+    _published: tuple | None = None
+
+    def __init__(
+        self, coordinator, config_entry, name: str, description, unique_id=None
+    ):
+        self.entity_description = description
+        self._attr_name = name
         self.entity_id = generate_entity_id(
-            entity_id_format="sensor.{}", 
-            name=self.name,
+            entity_id_format="sensor.{}",
+            name=name,
             hass=coordinator.hass
         )
-        # self._attr_unique_id = f"{super(APSystemsApiSystemSummarySensor, self).unique_id}_{self.name}"
-        self._attr_unique_id = f"{super(APSystemsApiSystemSummarySensor, self).unique_id}_{self.name}"
+        # Earlier versions built this from the entity's still unset unique id,
+        # hence the "None_" prefix. Their registry entries are moved to these ids
+        # by _async_migrate_legacy_entities.
+        self._attr_unique_id = unique_id or f"None_{name}"
         super().__init__(coordinator, config_entry)
-        
-    # @property
-    # def unique_id(self):
-    #     return f"{super(APSystemsApiSystemSummarySensor, self).unique_id}_{self.name}"
-
 
+    def _system_device(self, sid: str) -> DeviceInfo:
+        return DeviceInfo(
+            identifiers={(DOMAIN, sid)},
+            name=f"{NAME} {sid}",
+            model=VERSION,
+            manufacturer=NAME,
+        )
 
-    # @property
-    # def entity_id(self):
-    #     _LOGGER.warning("PAT TEST entity_id %s", str(super(APSystemsApiSystemSummarySensor, self).entity_id))
-    #     return f"{super(APSystemsApiSystemSummarySensor, self).unique_id}_{self.name}"
+    def _ecu_device(self, ecu_id: str) -> DeviceInfo:
+        """Device shared by every sensor of an ECU, under its system's device."""
+        sid = next(
+            (
+                sid
+                for sid, ecu_ids in self.coordinator.client.systems.items()
+                if ecu_id in ecu_ids
+            ),
+            None,
+        )
+        return DeviceInfo(
+            identifiers={(DOMAIN, ecu_id)},
+            name=f"ECU {ecu_id}",
+            model=VERSION,
+            manufacturer=NAME,
+            via_device=(DOMAIN, sid) if sid is not None else None,
+        )
 
-    @property
-    def name(self):
-        """Return the name of the sensor."""
-        return f"{DEFAULT_NAME}_{SENSOR}_{self.data_key}"
-    
-    @property
-    def device_info(self):
-        return {
-            "identifiers": {(DOMAIN, self.unique_id)},
-            "name": self.name,
-            "model": VERSION,
-            "manufacturer": NAME,
-        }
+    def _record(self) -> typing.Any:
+        """Return the record of the fleet data this sensor reads."""
+        return None
 
-    @property
-    def available(self) -> bool:
+    def _value(self) -> StateType:
+        record = self._record()
+        return None if record is None else self.entity_description.value_fn(record)
+
+    def _update_attrs(self) -> None:
+        value = self._value()
+        previous = self._attr_native_value
+        deadband = self.entity_description.deadband
+        if deadband and value and previous and abs(value - previous) < deadband:
+            # Within the deadband the last published value stands.
+            value = previous
+        self._attr_native_value = value
+        self._attr_available = value is not None
+
+    def _changed(self) -> bool:
+        published = (
+            self._attr_available,
+            self._attr_native_value,
+            self._attr_extra_state_attributes,
+        )
+        if published == self._published:
+            return False
+        self._published = published
         return True
 
     @property
-    def state(self):
-
-        # _LOGGER.warning(
-        #     "PAT TEST XYZ %s",
-        #     str(self)
-        # )
-        _LOGGER.warning(
-            "PAT TEST XYZ %s %s", str(self.coordinator), str(self.coordinator.__class__)
-        )
-        data: APSystemsApiSystemSummaryClient.SystemData = self.coordinator.data
-        _LOGGER.warning("PAT TEST XYZ %s", str(data))
-        if data and data.ecu_minutely_energy and (value := getattr(data.ecu_minutely_energy, self.data_key, None)):
-            return value
-            return self.coordinator.data.month
+    def available(self) -> bool:
+        return self._attr_available
 
-        return STATE_UNAVAILABLE  # self.coordinator.data.get("body")
 
-    @property
-    def icon(self):
-        return ICON
+class APSystemsApiSystemSummarySensor(APSystemsApiSensor):
+    """apsystems_api system summary sensor class."""
 
-    @property
-    def device_class(self):
-        if self.data_key == "latest_power":
-            return SensorDeviceClass.POWER
-        if self.data_key == "latest_energy":
-            return SensorDeviceClass.POWER
-        return None
+    def __init__(self, coordinator, config_entry, sid: str, description):
+        self.sid = sid
+        super().__init__(
+            coordinator,
+            config_entry,
+            f"{DEFAULT_NAME}_{SENSOR}_{sid}_{description.key}",
+            description,
+        )
+        self._attr_device_info = self._system_device(sid)
 
-    # async def async_update(self) -> None:
-    #     """Update the entity.
+    def _record(self):
+        data: APSystemsApiFleetClient.FleetData = self.coordinator.data
+        return data.system_summary.get(self.sid) if data else None
 
-    #     Only used by the generic entity update service.
-    #     """
-    #     # Ignore manual update requests if the entity is disabled
-    #     # if not self.enabled:
-    #     #     return
 
-    #     await super().async_update()
-    #     # await self.coordinator.async_request_refresh()
+class APSystemsApiECUMinutelyEnergyDataSensor(APSystemsApiSensor):
+    """apsystems_api ECU sensor class."""
 
+    def __init__(self, coordinator, config_entry, ecu_id: str, description):
+        self.ecu_id = ecu_id
+        super().__init__(
+            coordinator,
+            config_entry,
+            f"{DEFAULT_NAME}_{SENSOR}_{ecu_id}_{description.key}",
+            description,
+        )
+        self._attr_device_info = self._ecu_device(ecu_id)
+
+    def _record(self):
+        data: APSystemsApiFleetClient.FleetData = self.coordinator.data
+        return data.ecu_minutely_energy.get(self.ecu_id) if data else None
+
+
+class APSystemsApiECUAnalyticsSensor(APSystemsApiSensor):
+    """apsystems_api sensor of statistics derived from the ECU series."""
+
+    def __init__(self, coordinator, config_entry, ecu_id: str, description):
+        self.ecu_id = ecu_id
+        super().__init__(
+            coordinator,
+            config_entry,
+            f"{DEFAULT_NAME}_{SENSOR}_{ecu_id}_{description.key}",
+            description,
+            unique_id=(
+                f"{config_entry.entry_id}_{DEFAULT_NAME}_{SENSOR}_{ecu_id}_"
+                f"{description.key}"
+            ),
+        )
+        self._attr_device_info = self._ecu_device(ecu_id)
 
-class APSystemsApiECUMinutelyEnergyDataSensor(APSystemsApiEntity, SensorEntity):
-    """apsystems_api Sensor class."""
-    data_key: str
+    def _record(self):
+        data: APSystemsApiFleetClient.FleetData = self.coordinator.data
+        return data.ecu_analytics.get(self.ecu_id) if data else None
 
-    def __init__(self, coordinator, config_entry, data_key: str):
-        self.data_key = data_key
-        self.entity_id = generate_entity_id(
-            entity_id_format="sensor.{}", 
-            name=self.name,
-            hass=coordinator.hass
-        )
-        # self._attr_unique_id = f"{super(APSystemsApiSystemSummarySensor, self).unique_id}_{self.name}"
-        self._attr_unique_id = f"{super(APSystemsApiECUMinutelyEnergyDataSensor, self).unique_id}_{self.name}"
-        super().__init__(coordinator, config_entry)
-        
-    # @property
-    # def unique_id(self):
-    #     return f"{super(APSystemsApiSystemSummarySensor, self).unique_id}_{self.name}"
 
+class APSystemsApiForecastSensor(APSystemsApiECUAnalyticsSensor):
+    """apsystems_api sensor of the production forecast of an ECU."""
 
+    def _record(self):
+        data: APSystemsApiFleetClient.FleetData = self.coordinator.data
+        return data.forecasts.get(self.ecu_id) if data else None
 
-    # @property
-    # def entity_id(self):
-    #     _LOGGER.warning("PAT TEST entity_id %s", str(super(APSystemsApiSystemSummarySensor, self).entity_id))
-    #     return f"{super(APSystemsApiSystemSummarySensor, self).unique_id}_{self.name}"
 
-    @property
-    def name(self):
-        """Return the name of the sensor."""
-        return f"{DEFAULT_NAME}_{SENSOR}_{self.data_key}"
-    
-    @property
-    def device_info(self):
-        return {
-            "identifiers": {(DOMAIN, self.unique_id)},
-            "name": self.name,
-            "model": VERSION,
-            "manufacturer": NAME,
-        }
+class APSystemsApiInverterSensor(APSystemsApiSensor):
+    """apsystems_api inverter or inverter channel sensor class."""
 
-    @property
-    def available(self) -> bool:
-        return True
+    entity_description: APSystemsApiInverterSensorEntityDescription
 
-    @property
-    def state(self):
-
-        # _LOGGER.warning(
-        #     "PAT TEST XYZ %s",
-        #     str(self)
-        # )
-        _LOGGER.warning(
-            "PAT TEST XYZ %s %s", str(self.coordinator), str(self.coordinator.__class__)
+    def __init__(self, coordinator, config_entry, ecu_id: str, key: str, description):
+        self.ecu_id = ecu_id
+        self.key = key
+        super().__init__(
+            coordinator,
+            config_entry,
+            f"{DEFAULT_NAME}_{SENSOR}_{ecu_id}_{key}_{description.key}",
+            description,
+            unique_id=(
+                f"{config_entry.entry_id}_{DEFAULT_NAME}_{SENSOR}_{ecu_id}_{key}_"
+                f"{description.key}"
+            ),
+        )
+        # Channels are keyed <inverter uid>-<channel> and share their inverter's
+        # device.
+        inverter = key.rpartition("-")[0] or key
+        self._attr_device_info = DeviceInfo(
+            identifiers={(DOMAIN, inverter)},
+            name=f"Inverter {inverter}",
+            model=VERSION,
+            manufacturer=NAME,
+            via_device=(DOMAIN, ecu_id),
         )
-        data: APSystemsApiSystemSummaryClient.SystemData = self.coordinator.data
-        _LOGGER.warning("PAT TEST XYZ %s", str(data))
-        if data and data.system_summary and (value := getattr(data.system_summary, self.data_key, None)):
-            return value
-            return self.coordinator.data.month
 
-        return STATE_UNAVAILABLE  # self.coordinator.data.get("body")
+    def _record(self):
+        data: APSystemsApiFleetClient.FleetData = self.coordinator.data
+        return data.inverter_telemetry.get(self.ecu_id) if data else None
 
-    @property
-    def icon(self):
-        return ICON
+    def _value(self) -> StateType:
+        telemetry = self._record()
+        if telemetry is None:
+            return None
+        return self.entity_description.value_fn(telemetry, self.key)
 
-    @property
-    def device_class(self):
-        return SensorDeviceClass.ENERGY
 
-    # async def async_update(self) -> None:
-    #     """Update the entity.
+class APSystemsApiRequestBudgetSensor(APSystemsApiSensor):
+    """apsystems_api remaining request quota sensor class."""
 
-    #     Only used by the generic entity update service.
-    #     """
-    #     # Ignore manual update requests if the entity is disabled
-    #     # if not self.enabled:
-    #     #     return
+    def __init__(self, coordinator, config_entry):
+        name = f"{DEFAULT_NAME}_{SENSOR}_remaining_requests"
+        super().__init__(
+            coordinator,
+            config_entry,
+            name,
+            REQUEST_BUDGET_SENSOR,
+            unique_id=f"{config_entry.entry_id}_{name}",
+        )
+
+    async def async_added_to_hass(self) -> None:
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            async_track_time_interval(
+                self.hass, self._async_update_budget, BUDGET_UPDATE_INTERVAL
+            )
+        )
 
-    #     await super().async_update()
-    #     # await self.coordinator.async_request_refresh()
+    @callback
+    def _async_update_budget(self, _now) -> None:
+        self._update_attrs()
+        if self._changed():
+            self.async_write_ha_state()
+
+    def _record(self) -> APSystemsApiRequestGovernor:
+        return self.coordinator.client.governor
+
+    def _update_attrs(self) -> None:
+        super()._update_attrs()
+        governor = self._record()
+        self._attr_extra_state_attributes = {
+            "daily_budget": governor.daily_budget,
+            "tokens": round(governor.tokens, 2),
+            "requests": dict(governor.counts),
+        }
@@ -0,0 +1,69 @@
+"""Shared aiohttp session for the APSystems EMA host."""
+import logging
+
+import aiohttp
+from homeassistant.const import EVENT_HOMEASSISTANT_CLOSE
+from homeassistant.core import Event
+from homeassistant.core import HomeAssistant
+from homeassistant.util.ssl import client_context
+
+from .const import DOMAIN_DATA
+
+CONNECTION_LIMIT = 16
+CONNECTION_LIMIT_PER_HOST = 8
+KEEPALIVE_TIMEOUT = 300
+DNS_CACHE_TTL = 60 * 60
+
+_LOGGER: logging.Logger = logging.getLogger(__package__)
+
+
+def _create_session(hass: HomeAssistant) -> aiohttp.ClientSession:
+    """Create a session that keeps connections to the EMA host warm.
+
+    Idle connections are kept for longer than the fastest poll interval and DNS
+    answers are cached, so a refresh normally reuses an open TLS connection. All
+    connections share one SSL context.
+    """
+    connector = aiohttp.TCPConnector(
+        limit=CONNECTION_LIMIT,
+        limit_per_host=CONNECTION_LIMIT_PER_HOST,
+        keepalive_timeout=KEEPALIVE_TIMEOUT,
+        ttl_dns_cache=DNS_CACHE_TTL,
+        use_dns_cache=True,
+        enable_cleanup_closed=True,
+        ssl=client_context(),
+    )
+    return aiohttp.ClientSession(connector=connector)
+
+
+async def async_acquire_session(hass: HomeAssistant) -> aiohttp.ClientSession:
+    """Return the integration session, creating it for the first user."""
+    data = hass.data.setdefault(DOMAIN_DATA, {})
+    if data.get("session") is None or data["session"].closed:
+        session = data["session"] = _create_session(hass)
+        data["session_users"] = 0
+
+        async def _async_close(event: Event) -> None:
+            await session.close()
+
+        data["session_unsub"] = hass.bus.async_listen_once(
+            EVENT_HOMEASSISTANT_CLOSE, _async_close
+        )
+    data["session_users"] += 1
+    return data["session"]
+
+
+async def async_release_session(hass: HomeAssistant) -> None:
+    """Drop one user of the session and close it after the last one."""
+    data = hass.data.get(DOMAIN_DATA) or {}
+    if data.get("session") is None:
+        return
+    data["session_users"] -= 1
+    if data["session_users"] > 0:
+        return
+
+    session = data.pop("session")
+    data.pop("session_users")
+    data.pop("session_unsub")()
+    await session.close()
+    _LOGGER.debug("Closed APSystems API session")
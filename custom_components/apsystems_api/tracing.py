@@ -0,0 +1,31 @@
+"""Debug-gated structured tracing for APSystems API."""
+import logging
+
+_LOGGER: logging.Logger = logging.getLogger(__package__)
+
+
+class _Fields:
+    """Format the fields only when a handler actually emits the record."""
+
+    __slots__ = ("fields",)
+
+    def __init__(self, fields: dict) -> None:
+        self.fields = fields
+
+    def __str__(self) -> str:
+        return " ".join(f"{key}={value!r}" for key, value in self.fields.items())
+
+
+def trace_enabled() -> bool:
+    """Whether trace events are emitted, a cached level lookup in the logger."""
+    return _LOGGER.isEnabledFor(logging.DEBUG)
+
+
+def trace(event: str, **fields) -> None:
+    """Log ``event`` with ``fields`` as ``key=value`` pairs at debug level.
+
+    On hot paths guard the call with ``trace_enabled()`` so not even the keyword
+    arguments are built while debug logging is off.
+    """
+    if _LOGGER.isEnabledFor(logging.DEBUG):
+        _LOGGER.debug("%s %s", event, _Fields(fields))
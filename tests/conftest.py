@@ -37,3 +37,12 @@ def error_get_data_fixture():
         side_effect=Exception,
     ):
         yield
+
+
+# Entries without saved data wait a random moment before their first refresh, so
+# that many entries do not hit the API at once. Tests set up entries right away.
+@pytest.fixture(name="skip_first_refresh_jitter", autouse=True)
+def skip_first_refresh_jitter_fixture():
+    """Skip the random delay before the first refresh."""
+    with patch("custom_components.apsystems_api.FIRST_REFRESH_JITTER", 0):
+        yield
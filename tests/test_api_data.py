@@ -0,0 +1,202 @@
+"""Tests for APSystems API data structures."""
+from datetime import date
+from datetime import timedelta
+from unittest.mock import patch
+
+import pytest
+from custom_components.apsystems_api.api import APSystemsApiBase
+from custom_components.apsystems_api.api import APSystemsApiSchemaException
+
+
+def test_ecu_minutely_energy_day_buffer():
+    """Test that the day buffer merges the new tail and rolls over by day."""
+    buffer = APSystemsApiBase.ECUMinutelyEnergyDayBuffer()
+
+    data = buffer.merge(
+        "2023-06-01",
+        {"today": "1", "time": ["00:00", "00:05"], "power": [0, 2], "energy": ["0", "1"]},
+    )
+    assert data.latest_power == 2.0
+
+    merged = buffer.merge(
+        "2023-06-01",
+        {
+            "today": "2",
+            "time": ["00:00", "00:05", "00:10"],
+            "power": [0, 4, 6],
+            "energy": ["0", "1", "2"],
+        },
+    )
+    assert merged is data
+    assert list(merged.power) == [0.0, 4.0, 6.0]
+    assert merged.latest_energy == 2.0
+    assert merged.today == 2.0
+
+    rolled = buffer.merge(
+        "2023-06-02", {"today": "0", "time": ["00:00"], "power": [0], "energy": ["0"]}
+    )
+    assert rolled is not data
+    assert len(rolled.time) == 1
+
+
+def test_ecu_minutely_energy_data_window():
+    """Test the compact columns and zero-copy windows."""
+    data = APSystemsApiBase.ECUMinutelyEnergyData.from_payload(
+        "2023-06-01",
+        {
+            "today": "0.5",
+            "time": ["10:00", "10:05", "10:10", "10:15"],
+            "power": [100, 200, 300, 400],
+            "energy": ["0.1", "0.2", "0.3", "0.4"],
+        },
+    )
+    assert data.time.typecode == "l"
+    assert data.power.typecode == "d"
+    assert data.time[1] - data.time[0] == 300
+
+    window = data.window(data.time[1], data.time[3])
+    assert window.power.tolist() == [200.0, 300.0]
+    assert window.energy.obj is data.energy
+    window.release()
+
+
+def test_payload_schema():
+    """Test that unknown keys are ignored and malformed columns are rejected."""
+    summary = APSystemsApiBase.SystemSummaryData.from_payload(
+        {"today": "1", "month": "2", "year": "3", "lifetime": "4", "new_key": "5"}
+    )
+    assert summary.lifetime == "4"
+
+    data = APSystemsApiBase.ECUMinutelyEnergyData.from_payload(
+        "2023-06-01",
+        {"today": "1", "time": ["10:00"], "power": [1], "energy": ["1"], "x": 1},
+    )
+    with pytest.raises(APSystemsApiSchemaException):
+        data.extend(
+            "2023-06-01",
+            {"today": "1", "time": ["10:00", "10:05"], "power": [1], "energy": []},
+            0,
+        )
+    with pytest.raises(APSystemsApiSchemaException):
+        data.extend(
+            "2023-06-01",
+            {"today": "1", "time": ["10:00"], "power": ["n/a"], "energy": ["1"]},
+            0,
+        )
+    assert list(data.power) == [1.0]
+
+
+def test_energy_level_selection():
+    """Test that the coarsest level answering a query is chosen."""
+    start = date(2023, 3, 1)
+
+    assert (
+        APSystemsApiBase.choose_energy_level("ecu", start, date(2023, 6, 1))
+        == "daily"
+    )
+    assert (
+        APSystemsApiBase.choose_energy_level("ecu", start, date(2024, 3, 1))
+        == "monthly"
+    )
+    assert (
+        APSystemsApiBase.choose_energy_level(
+            "system", start, date(2023, 3, 2), timedelta(minutes=5)
+        )
+        == "hourly"
+    )
+    assert APSystemsApiBase.energy_periods("daily", start, date(2023, 6, 1)) == [
+        ("2023-03", date(2023, 3, 1)),
+        ("2023-04", date(2023, 4, 1)),
+        ("2023-05", date(2023, 5, 1)),
+    ]
+
+
+def test_time_series_from_payload():
+    """Test parsing list and per channel replies into a compact series."""
+    daily = APSystemsApiBase.TimeSeries.from_payload(
+        "daily", date(2023, 3, 1), ["1.5", "2.5", "3"]
+    )
+    assert daily.time[1] - daily.time[0] == 86400
+    assert daily.total == 7.0
+
+    hourly = APSystemsApiBase.TimeSeries.from_payload(
+        "hourly", date(2023, 3, 1), {"e1": ["1", "2"], "e2": ["0.5", "0.5"]}
+    )
+    assert list(hourly.energy) == [1.5, 2.5]
+
+    window = APSystemsApiBase.TimeSeries(level="daily")
+    window.extend(daily, daily.time[1], daily.time[2])
+    assert list(window.energy) == [2.5]
+
+
+def test_inverter_telemetry_data():
+    """Test per-inverter and per-channel power and integrated energy."""
+    data = APSystemsApiBase.InverterTelemetryData.from_payload(
+        "2023-06-01",
+        {
+            "time": ["10:00", "10:30", "11:00"],
+            "power": {"801-1": [100, 200, 300], "801-2": ["50", "50", "50"]},
+        },
+    )
+    assert data.inverters == {"801": ("801-1", "801-2")}
+    assert data.latest_power("801-1") == 300.0
+    assert data.latest_power("801") == 350.0
+    assert data.energy("801-1") == pytest.approx(0.15)
+    assert data.energy("801") == pytest.approx(0.2)
+    assert data.latest_power("802") is None
+
+    # Channels are integrated once per record, later reads use the totals.
+    data.channels["801-1"][0] = 0
+    assert data.energy("801-1") == pytest.approx(0.15)
+    assert data == APSystemsApiBase.InverterTelemetryData.from_dict(data.as_dict())
+
+    with pytest.raises(APSystemsApiSchemaException):
+        APSystemsApiBase.InverterTelemetryData.from_payload(
+            "2023-06-01", {"time": ["10:00"], "power": {"801-1": [1, 2]}}
+        )
+
+
+def test_ecu_minutely_analytics():
+    """Test that day statistics fold in new samples incrementally."""
+    buffer = APSystemsApiBase.ECUMinutelyEnergyDayBuffer()
+    analytics = APSystemsApiBase.ECUMinutelyAnalytics()
+
+    data = buffer.merge(
+        "2023-06-01",
+        {
+            "today": "0.1",
+            "time": ["06:00", "06:05", "06:10"],
+            "power": [0, 600, 1200],
+            "energy": [0, 0.05, 0.1],
+        },
+    )
+    analytics.update(data)
+    assert analytics.peak_power == 1200.0
+    assert analytics.peak_time == data.time[2]
+    assert analytics.start_time == data.time[1]
+    assert analytics.integrated_energy == pytest.approx(0.1)
+    assert analytics.energy_check == pytest.approx(0.0)
+    assert analytics.ramp_rate == 120.0
+    assert analytics.average_15min == 600.0
+
+    # The last sample is revised and one more arrives.
+    data = buffer.merge(
+        "2023-06-01",
+        {
+            "today": "0.2",
+            "time": ["06:00", "06:05", "06:10", "06:15"],
+            "power": [0, 600, 900, 0],
+            "energy": [0, 0.05, 0.1, 0.05],
+        },
+    )
+    with patch.object(
+        APSystemsApiBase.ECUMinutelyAnalytics,
+        "_fold",
+        wraps=APSystemsApiBase.ECUMinutelyAnalytics._fold,
+    ) as fold:
+        analytics.update(data)
+    assert fold.call_count == 2
+    assert analytics.peak_power == 900.0
+    assert analytics.end_time == data.time[2]
+    assert analytics.integrated_energy == pytest.approx(0.125)
+    assert analytics.average_5min == 0.0
@@ -0,0 +1,241 @@
+"""Tests for APSystems API payload handling."""
+import asyncio
+import base64
+import hashlib
+import hmac
+import json
+from unittest.mock import patch
+
+import aiohttp
+import pytest
+from custom_components.apsystems_api.api import APSystemsApiBase
+from custom_components.apsystems_api.api import APSystemsApiBudgetExceededException
+from custom_components.apsystems_api.api import APSystemsApiCircuitBreaker
+from custom_components.apsystems_api.api import APSystemsApiCircuitOpenException
+from custom_components.apsystems_api.api import APSystemsApiSigner
+from custom_components.apsystems_api.api import BREAKER_THRESHOLD
+from custom_components.apsystems_api.governor import APSystemsApiRequestGovernor
+
+SUMMARY = {
+    "code": 0,
+    "data": {"today": "1.5", "month": "20", "year": "300", "lifetime": "4000"},
+}
+
+
+class MockResponse:
+    """Minimal aiohttp response."""
+
+    def __init__(self, body, status=200, headers=None):
+        self.body = body
+        self.status = status
+        self.headers = headers or {}
+
+    def raise_for_status(self):
+        pass
+
+    def release(self):
+        pass
+
+    async def read(self):
+        return self.body
+
+
+class MockSession:
+    """Session replaying queued responses and recording request headers."""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.headers = []
+
+    async def get(self, url, params=None, headers=None):
+        self.headers.append(headers)
+        return self.responses.pop(0)
+
+
+async def test_unchanged_payload_is_not_parsed_again():
+    """Test that identical bodies and 304 replies reuse the parsed value."""
+    body = json.dumps(SUMMARY).encode()
+    session = MockSession(
+        MockResponse(body, headers={"ETag": '"v1"'}),
+        MockResponse(body),
+        MockResponse(b"", status=304),
+    )
+    api = APSystemsApiBase("test", "test", "sid", "ecu", session)
+    api.cache.ttls = {}
+
+    first = await api.system_summary()
+    assert first.today == "1.5"
+    assert api.changes == 1
+
+    assert await api.system_summary() is first
+    assert session.headers[1]["If-None-Match"] == '"v1"'
+    assert await api.system_summary() is first
+    assert api.changes == 1
+
+
+def test_signer_matches_ema_signature():
+    """Test that the precomputed signer signs like the EMA reference scheme."""
+    signer = APSystemsApiSigner("app", "secret")
+    signer.prepare("GET", ["/user/api/v2/systems/summary/sid"])
+    headers = signer.headers("GET", "/user/api/v2/systems/summary/sid")
+
+    message = "/".join(
+        [
+            headers["x-ca-timestamp"],
+            headers["x-ca-nonce"],
+            "app",
+            "sid",
+            "GET",
+            "HmacSHA256",
+        ]
+    )
+    expected = hmac.new(b"secret", message.encode(), hashlib.sha256).digest()
+    assert headers["x-ca-signature"] == base64.b64encode(expected).decode()
+    assert headers["x-ca-appid"] == "app"
+
+
+class FlakySession(MockSession):
+    """Session failing with connection errors before replaying responses."""
+
+    def __init__(self, failures, *responses):
+        super().__init__(*responses)
+        self.failures = failures
+
+    async def get(self, url, params=None, headers=None):
+        if self.failures:
+            self.failures -= 1
+            self.headers.append(headers)
+            raise aiohttp.ClientConnectionError()
+        return await super().get(url, params=params, headers=headers)
+
+
+async def test_request_retries_with_fresh_signature():
+    """Test that transient failures are retried and re-signed."""
+    session = FlakySession(2, MockResponse(json.dumps(SUMMARY).encode()))
+    api = APSystemsApiBase("test", "test", "sid", "ecu", session)
+    api.base_url = "https://retry.invalid"
+    api.cache.ttls = {}
+
+    with patch("custom_components.apsystems_api.api.RETRY_BACKOFF", 0):
+        assert (await api.system_summary()).lifetime == "4000"
+
+    nonces = {headers["x-ca-nonce"] for headers in session.headers}
+    assert len(nonces) == 3
+
+
+async def test_circuit_breaker_fails_fast():
+    """Test that an open circuit skips requests until its reset timeout."""
+    session = FlakySession(100)
+    api = APSystemsApiBase("test", "test", "sid", "ecu", session)
+    api.base_url = "https://breaker.invalid"
+    api.cache.ttls = {}
+
+    with patch("custom_components.apsystems_api.api.RETRY_BACKOFF", 0):
+        with pytest.raises(aiohttp.ClientConnectionError):
+            await api.system_summary()
+        with pytest.raises(APSystemsApiCircuitOpenException):
+            await api.system_summary()
+        with pytest.raises(APSystemsApiCircuitOpenException):
+            await api.system_summary()
+
+    assert len(session.headers) == BREAKER_THRESHOLD
+    assert APSystemsApiCircuitBreaker.for_host("breaker.invalid").is_open
+
+
+async def test_concurrent_identical_gets_share_one_request():
+    """Test that identical GETs in flight are sent once and share the value."""
+
+    class SlowSession(MockSession):
+        async def get(self, url, params=None, headers=None):
+            await asyncio.sleep(0.01)
+            return await super().get(url, params=params, headers=headers)
+
+    session = SlowSession(
+        MockResponse(json.dumps(SUMMARY).encode()),
+        MockResponse(json.dumps(SUMMARY).encode()),
+    )
+    api = APSystemsApiBase("test", "test", "sid", "ecu", session)
+
+    first, second = await asyncio.gather(
+        api._get_data("system_summary", "/path", {"a": 1}),
+        api._get_data("system_summary", "/path", {"a": 1}),
+    )
+    assert first is second
+    assert len(session.headers) == 1
+    assert api._in_flight == {}
+
+    await api._get_data("system_summary", "/path", {"a": 1})
+    assert len(session.headers) == 2
+
+
+async def test_joined_get_survives_cancelled_owner():
+    """Test that callers sharing a GET fetch it themselves if its owner is cancelled."""
+
+    class SlowSession(MockSession):
+        async def get(self, url, params=None, headers=None):
+            await asyncio.sleep(0.01)
+            return await super().get(url, params=params, headers=headers)
+
+    session = SlowSession(
+        MockResponse(json.dumps(SUMMARY).encode()),
+        MockResponse(json.dumps(SUMMARY).encode()),
+    )
+    api = APSystemsApiBase("test", "test", "sid", "ecu", session)
+
+    owner = asyncio.create_task(api._get_data("system_summary", "/path"))
+    await asyncio.sleep(0)
+    joined = asyncio.create_task(api._get_data("system_summary", "/path"))
+    await asyncio.sleep(0)
+    owner.cancel()
+
+    assert (await joined)["today"] == "1.5"
+    assert owner.cancelled()
+    assert api._in_flight == {}
+
+
+async def test_circuit_breaker_trial_is_released():
+    """Test that a trial refused by the budget or cancelled does not stick."""
+    breaker = APSystemsApiCircuitBreaker.for_host("trial.invalid")
+    breaker.reset_timeout = 0
+    breaker.opened_at = 0.0
+
+    class HangingSession(MockSession):
+        async def get(self, url, params=None, headers=None):
+            await asyncio.sleep(10)
+
+    api = APSystemsApiBase("test", "test", "sid", "ecu", HangingSession())
+    api.base_url = "https://trial.invalid"
+    api.cache.ttls = {}
+    api.governor = APSystemsApiRequestGovernor(daily_budget=1, burst=1)
+    api.governor.tokens = 0
+
+    with pytest.raises(APSystemsApiBudgetExceededException):
+        await api.system_summary()
+    assert breaker.available
+
+    api.governor = None
+    task = asyncio.create_task(api.system_summary())
+    await asyncio.sleep(0.01)
+    assert not breaker.available
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+
+    assert breaker.available
+    assert breaker.is_open
+
+
+async def test_past_days_are_not_remembered():
+    """Test that replies of past days do not stay in the payload cache."""
+    body = json.dumps(
+        {"code": 0, "data": {"today": "1", "time": ["10:00"], "power": [1], "energy": [1]}}
+    ).encode()
+    api = APSystemsApiBase(
+        "test", "test", "sid", "ecu", MockSession(MockResponse(body), MockResponse(body))
+    )
+
+    past = await api.ecu_minutely_energy(day="2023-06-01")
+    assert past.latest_power == 1.0
+    assert not api._payloads
+
+    await api.ecu_minutely_energy()
+    assert len(api._payloads) == 1
@@ -0,0 +1,72 @@
+"""Tests for APSystems API historical backfill."""
+from datetime import date
+from datetime import timedelta
+from unittest.mock import AsyncMock
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+from custom_components.apsystems_api.api import APSystemsApiBase
+from custom_components.apsystems_api.backfill import APSystemsApiBackfill
+from custom_components.apsystems_api.backfill import BACKFILL_MAX_DAYS
+from custom_components.apsystems_api.backfill import hourly_statistics
+from custom_components.apsystems_api.backfill import statistic_id
+from homeassistant.util import dt as dt_util
+
+
+def test_hourly_statistics_continue_running_total():
+    """Test that samples fold into hourly rows on top of the previous total."""
+    data = APSystemsApiBase.ECUMinutelyEnergyData.from_payload(
+        "2023-06-01",
+        {
+            "today": "0.6",
+            "time": ["10:00", "10:30", "11:00"],
+            "power": [100, 200, 300],
+            "energy": ["0.1", "0.2", "0.3"],
+        },
+    )
+    rows, total = hourly_statistics(data, 5.0)
+
+    assert [round(row["sum"], 6) for row in rows] == [5.3, 5.6]
+    assert rows[1]["start"] - rows[0]["start"] == timedelta(hours=1)
+    assert round(total, 6) == 5.6
+
+
+def test_missing_days_resume_after_progress():
+    """Test that only days after the saved progress are fetched."""
+    backfill = APSystemsApiBackfill(MagicMock(), MagicMock(), MagicMock())
+    today = date(2023, 6, 10)
+
+    assert len(backfill.missing_days("ecu", today)) == BACKFILL_MAX_DAYS
+
+    backfill.progress = {"ecu": {"day": "2023-06-07", "sum": 1.0}}
+    assert backfill.missing_days("ecu", today) == ["2023-06-08", "2023-06-09"]
+
+
+async def test_backfill_resumes_after_recorded_statistics():
+    """Test that ECUs without saved progress resume after the recorder's last row."""
+    client = MagicMock()
+    client.systems = {"sid": ["ecu"]}
+    client.governor = None
+    client.ecu_minutely_energy = AsyncMock(
+        return_value=APSystemsApiBase.ECUMinutelyEnergyData.from_payload("2023-06-01", {})
+    )
+    backfill = APSystemsApiBackfill(MagicMock(), client, MagicMock())
+    yesterday = dt_util.start_of_local_day() - timedelta(days=1)
+    recorder = MagicMock()
+    recorder.async_add_executor_job = AsyncMock(
+        return_value={
+            statistic_id("ecu"): [
+                {"start": (yesterday - timedelta(days=1)).timestamp(), "sum": 2.0}
+            ]
+        }
+    )
+
+    with patch(
+        "custom_components.apsystems_api.backfill.get_instance", return_value=recorder
+    ):
+        await backfill.async_run()
+
+    assert backfill.progress["ecu"]["sum"] == 2.0
+    client.ecu_minutely_energy.assert_awaited_once_with(
+        "sid", "ecu", yesterday.date().isoformat()
+    )
@@ -0,0 +1,45 @@
+"""Tests for the APSystems API response cache."""
+import asyncio
+
+from custom_components.apsystems_api.api import APSystemsApiResponseCache
+
+
+async def test_cache_ttl_and_stale_while_revalidate():
+    """Test fresh hits, stale hits with a background refresh and invalidation."""
+    cache = APSystemsApiResponseCache(ttls={"summary": 0.05}, stale_ttl=10)
+    calls = 0
+
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        return calls
+
+    assert await cache.get("summary", "/s/1", None, fetch) == 1
+    assert await cache.get("summary", "/s/1", None, fetch) == 1
+    assert calls == 1
+
+    await asyncio.sleep(0.06)
+    assert await cache.get("summary", "/s/1", None, fetch) == 1
+    await asyncio.sleep(0)
+    assert calls == 2
+    assert await cache.get("summary", "/s/1", None, fetch) == 2
+
+    cache.invalidate("summary")
+    assert await cache.get("summary", "/s/1", None, fetch) == 3
+
+
+async def test_cache_is_bounded_and_skips_uncached_endpoints():
+    """Test the LRU bound and endpoints without a TTL."""
+    cache = APSystemsApiResponseCache(ttls={"summary": 60}, max_entries=2)
+
+    async def fetch():
+        return object()
+
+    first = await cache.get("summary", "/s/1", None, fetch)
+    await cache.get("summary", "/s/2", None, fetch)
+    await cache.get("summary", "/s/3", None, fetch)
+    assert await cache.get("summary", "/s/1", None, fetch) is not first
+
+    assert await cache.get("energy", "/e/1", None, fetch) is not await cache.get(
+        "energy", "/e/1", None, fetch
+    )
@@ -0,0 +1,89 @@
+"""Tests for APSystems API concurrent fan-out."""
+import asyncio
+
+from custom_components.apsystems_api.api import APSystemsApiFanOut
+
+
+async def test_fan_out_runs_calls_concurrently():
+    """Test that calls overlap and results are kept per key."""
+    released = asyncio.Event()
+
+    async def first():
+        # Only finishes if the second call runs while this one waits.
+        await released.wait()
+        return "a"
+
+    async def second():
+        released.set()
+        return "b"
+
+    fan_out = APSystemsApiFanOut(timeout=1)
+    fan_out.add("a", first)
+    fan_out.add("b", second)
+    result = await fan_out.run()
+
+    assert result.complete
+    assert result.values == {"a": "a", "b": "b"}
+
+
+async def test_fan_out_cancel_cancels_calls():
+    """Test that cancelling the fan-out cancels the calls still running."""
+    started = asyncio.Event()
+    calls = []
+
+    async def slow():
+        calls.append(asyncio.current_task())
+        started.set()
+        await asyncio.sleep(10)
+
+    fan_out = APSystemsApiFanOut(timeout=10)
+    fan_out.add("slow", slow)
+    run = asyncio.create_task(fan_out.run())
+    await started.wait()
+    run.cancel()
+    await asyncio.gather(run, return_exceptions=True)
+    await asyncio.sleep(0)
+
+    assert calls[0].cancelled()
+
+
+async def test_fan_out_partial_results():
+    """Test that errors and the deadline only affect their own key."""
+
+    async def ok():
+        return 1
+
+    async def fail():
+        raise ValueError("boom")
+
+    async def slow():
+        await asyncio.sleep(10)
+
+    fan_out = APSystemsApiFanOut(timeout=0.05)
+    fan_out.add("ok", ok)
+    fan_out.add("fail", fail)
+    fan_out.add("slow", slow)
+    result = await fan_out.run()
+
+    assert not result.complete
+    assert result.values == {"ok": 1}
+    assert isinstance(result.errors["fail"], ValueError)
+    assert isinstance(result.errors["slow"], asyncio.TimeoutError)
+
+
+async def test_fan_out_cancelled_call():
+    """Test that a call cancelled from elsewhere only fails its own key."""
+
+    async def cancelled():
+        raise asyncio.CancelledError
+
+    async def value():
+        return "b"
+
+    fan_out = APSystemsApiFanOut(timeout=1)
+    fan_out.add("a", cancelled)
+    fan_out.add("b", value)
+    result = await fan_out.run()
+
+    assert isinstance(result.errors["a"], asyncio.CancelledError)
+    assert result.values == {"b": "b"}
@@ -0,0 +1,170 @@
+"""Tests for the APSystems API fleet client."""
+import asyncio
+import json
+from datetime import datetime
+from unittest.mock import patch
+
+from custom_components.apsystems_api.api import APSystemsApiBase
+from custom_components.apsystems_api.api import APSystemsApiBudgetExceededException
+from custom_components.apsystems_api.api import APSystemsApiFleetClient
+from custom_components.apsystems_api.governor import APSystemsApiRequestGovernor
+
+
+def test_parse_systems():
+    """Test mapping configured system and ECU ids."""
+    assert APSystemsApiFleetClient.parse_systems("s1", "e1, e2") == {
+        "s1": ["e1", "e2"]
+    }
+    assert APSystemsApiFleetClient.parse_systems("s1,s2", "e1") == {
+        "s1": [],
+        "s2": [],
+    }
+
+
+async def test_fleet_get_data():
+    """Test that the fleet discovers ECUs and limits requests in flight."""
+    client = APSystemsApiFleetClient(
+        "test", "test", {"s1": [], "s2": ["e3"]}, session=None, concurrency=2
+    )
+    in_flight = 0
+    peak = 0
+
+    async def system_details(sid):
+        return APSystemsApiBase.SystemDetailsData(sid=sid, timezone=None, ecu=["e1"])
+
+    async def system_summary(sid):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return APSystemsApiBase.SystemSummaryData(sid, "0", "0", "0")
+
+    async def ecu_minutely_energy(sid, ecu_id):
+        if ecu_id == "e3":
+            raise ValueError(ecu_id)
+        await system_summary(sid)
+        return APSystemsApiBase.ECUMinutelyEnergyData.from_payload("2023-06-01", {})
+
+    with patch.object(client, "system_details", system_details), patch.object(
+        client, "system_summary", system_summary
+    ), patch.object(client, "ecu_minutely_energy", ecu_minutely_energy):
+        data = await client.async_get_data()
+
+    assert client.systems == {"s1": ["e1"], "s2": ["e3"]}
+    assert set(data.system_summary) == {"s1", "s2"}
+    assert data.ecu_minutely_energy["e1"] is not None
+    assert data.ecu_minutely_energy["e3"] is None
+    assert peak <= 2
+
+
+async def test_fleet_inverter_telemetry():
+    """Test that inverter telemetry is one batched request per ECU."""
+    client = APSystemsApiFleetClient(
+        "test", "test", {"s1": ["e1", "e2"]}, session=None, inverter_telemetry=True
+    )
+    calls = []
+
+    async def system_summary(sid):
+        return APSystemsApiBase.SystemSummaryData(sid, "0", "0", "0")
+
+    async def ecu_minutely_energy(sid, ecu_id):
+        return None
+
+    async def ecu_inverter_telemetry(sid, ecu_id):
+        calls.append(ecu_id)
+        return APSystemsApiBase.InverterTelemetryData.from_payload(
+            "2023-06-01", {"time": ["10:00"], "power": {f"{ecu_id}01-1": [1]}}
+        )
+
+    with patch.object(client, "system_summary", system_summary), patch.object(
+        client, "ecu_minutely_energy", ecu_minutely_energy
+    ), patch.object(client, "ecu_inverter_telemetry", ecu_inverter_telemetry):
+        data = await client.async_get_data()
+
+    assert sorted(calls) == ["e1", "e2"]
+    assert client.requests_per_refresh == 5
+    assert data.inverter_telemetry["e2"].latest_power("e201") == 1.0
+
+
+def test_fleet_data_restore():
+    """Test saving fleet data compactly and restoring it at startup."""
+    client = APSystemsApiFleetClient("test", "test", {"s1": ["e1"]}, session=None)
+    energy = APSystemsApiBase.ECUMinutelyEnergyData.from_payload(
+        datetime.now().strftime("%Y-%m-%d"),
+        {"today": "1", "time": ["00:00", "00:05"], "power": [0, 2], "energy": [0, 1]},
+    )
+    data = APSystemsApiFleetClient.FleetData(
+        system_summary={"s1": APSystemsApiBase.SystemSummaryData("1", "2", "3", "4")},
+        ecu_minutely_energy={"e1": energy},
+        revision=7,
+    )
+    saved = json.loads(json.dumps(data.as_dict()))
+    assert saved["ecu_minutely_energy"]["e1"]["time"][1] == 300
+
+    restored = client.restore(saved)
+    assert restored.system_summary == data.system_summary
+    assert restored.ecu_minutely_energy == data.ecu_minutely_energy
+    assert restored.ecu_analytics["e1"].peak_power == 2.0
+    assert client.data is restored
+    assert client.changes == 7
+    assert client.restore({**saved, "saved": 0}) is None
+    assert client.restore(None) is None
+
+
+async def test_fleet_budget_is_fair():
+    """Test that a tight budget does not starve the same ECUs every refresh."""
+    ecu_ids = [f"e{index}" for index in range(30)]
+    governor = APSystemsApiRequestGovernor(daily_budget=1000)
+    client = APSystemsApiFleetClient(
+        "test",
+        "test",
+        {"s1": ecu_ids},
+        session=None,
+        governor=governor,
+        inverter_telemetry=True,
+    )
+    served = set()
+
+    def acquire(endpoint):
+        if not governor.try_acquire(endpoint):
+            raise APSystemsApiBudgetExceededException(endpoint)
+
+    async def system_summary(sid):
+        acquire("system_summary")
+        return APSystemsApiBase.SystemSummaryData(sid, "0", "0", "0")
+
+    async def ecu_minutely_energy(sid, ecu_id):
+        acquire("ecu_minutely_energy")
+        served.add(ecu_id)
+
+    async def ecu_inverter_telemetry(sid, ecu_id):
+        acquire("ecu_inverter_telemetry")
+
+    with patch.object(client, "system_summary", system_summary), patch.object(
+        client, "ecu_minutely_energy", ecu_minutely_energy
+    ), patch.object(client, "ecu_inverter_telemetry", ecu_inverter_telemetry):
+        await client.async_get_data()
+        assert governor.burst >= client.requests_per_refresh == 61
+        assert len(served) < 30
+
+        governor.tokens = 41
+        await client.async_get_data()
+
+    assert served == set(ecu_ids)
+
+
+def test_fleet_restore_discovered_ecus():
+    """Test that ECUs discovered before a restart are known right away."""
+    client = APSystemsApiFleetClient(
+        "test", "test", APSystemsApiFleetClient.parse_systems("s1,s2", ""), None
+    )
+    data = APSystemsApiFleetClient.FleetData(
+        system_summary={},
+        ecu_minutely_energy={},
+        systems={"s1": ["e1", "e2"], "s2": ["e3"], "s3": ["e4"]},
+    )
+
+    client.restore(json.loads(json.dumps(data.as_dict())))
+
+    assert client.systems == {"s1": ["e1", "e2"], "s2": ["e3"]}
@@ -0,0 +1,57 @@
+"""Tests for the APSystems API production forecast."""
+import os
+import tempfile
+from datetime import date
+from datetime import datetime
+from datetime import timedelta
+
+import pytest
+from custom_components.apsystems_api.api import APSystemsApiBase
+from custom_components.apsystems_api.forecast import APSystemsApiForecast
+from custom_components.apsystems_api.forecast import APSystemsApiForecastIndex
+from custom_components.apsystems_api.forecast import FORECAST_HISTORY_DAYS
+
+
+def _day(day: date, power: float, until: int = 24):
+    """A day producing ``power`` from 08:00 to 16:00, sampled until ``until``."""
+    times = [
+        f"{hour:02}:{minute:02}" for hour in range(until) for minute in range(0, 60, 5)
+    ]
+    return APSystemsApiBase.ECUMinutelyEnergyData.from_payload(
+        day.isoformat(),
+        {
+            "today": "0",
+            "time": times,
+            "power": [power if "08" <= t[:2] < "16" else 0 for t in times],
+            "energy": [0] * len(times),
+        },
+    )
+
+
+def test_forecast_nowcast():
+    """Test scaling the history baseline by today's last hour."""
+    today = date(2023, 6, 20)
+    with tempfile.TemporaryDirectory() as directory:
+        forecast = APSystemsApiForecast(directory, "test")
+        assert forecast.update({"e1": _day(today, 500, 12)}, 0) == {}
+
+        for offset in range(1, FORECAST_HISTORY_DAYS + 3):
+            forecast.add_day("e1", _day(today - timedelta(days=offset), 1000))
+        # The series lags the clock, its last sample is at 11:55.
+        now = datetime(2023, 6, 20, 12, 10).timestamp()
+        result = forecast.update({"e1": _day(today, 500, 12)}, now)["e1"]
+
+        assert result.nowcast_factor == pytest.approx(0.5)
+        assert result.next_hour == pytest.approx(0.5)
+        assert result.rest_of_day == pytest.approx(2.0)
+
+        index = APSystemsApiForecastIndex(os.path.join(directory, "test.e1.bin"))
+        index.load()
+        assert len(index.days) == FORECAST_HISTORY_DAYS
+        assert min(index.days) == (today - timedelta(days=14)).toordinal()
+        assert index.mean(12 * 12) == pytest.approx(1000)
+
+        # The first series of the next day adds the finished day to the index.
+        tomorrow = today + timedelta(days=1)
+        forecast.update({"e1": _day(tomorrow, 0, 1)}, now + 86400)
+        assert max(forecast._index("e1").days) == today.toordinal()
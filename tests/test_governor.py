@@ -0,0 +1,28 @@
+"""Tests for the APSystems API request governor."""
+from custom_components.apsystems_api.governor import APSystemsApiRequestGovernor
+
+
+def test_governor_spreads_and_counts_calls():
+    """Test the token bucket, the per endpoint counts and the daily quota."""
+    governor = APSystemsApiRequestGovernor(daily_budget=48, burst=2)
+
+    assert governor.try_acquire("system_summary")
+    assert governor.try_acquire("ecu_minutely_energy")
+    assert governor.tight
+    assert not governor.try_acquire("system_summary")
+
+    assert governor.counts == {"system_summary": 1, "ecu_minutely_energy": 1}
+    assert governor.remaining == 46
+
+
+def test_governor_restore():
+    """Test that the saved state survives a restart."""
+    governor = APSystemsApiRequestGovernor(daily_budget=10, burst=5)
+    governor.try_acquire("system_summary")
+
+    restored = APSystemsApiRequestGovernor(daily_budget=10, burst=5)
+    restored.restore(governor.as_dict())
+
+    assert restored.counts == {"system_summary": 1}
+    assert restored.remaining == 9
+    assert restored.tokens < 5
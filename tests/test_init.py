@@ -26,15 +26,19 @@ from .const import MOCK_CONFIG
 # Home Assistant using the pytest_homeassistant_custom_component plugin.
 # Assertions allow you to verify that the return value of whatever is on the left
 # side of the assertion matches with the right side.
-async def test_setup_unload_and_reload_entry(hass, bypass_get_data):
+async def test_setup_unload_and_reload_entry(
+    hass, enable_custom_integrations, bypass_get_data
+):
     """Test entry setup and unload."""
-    # Create a mock entry so we don't have to go through config flow
+    # Create a mock entry so we don't have to go through config flow. Reloading goes
+    # through the config entries manager, so the entry has to be known to it.
     config_entry = MockConfigEntry(domain=DOMAIN, data=MOCK_CONFIG, entry_id="test")
+    config_entry.add_to_hass(hass)
 
     # Set up the entry and assert that the values set during setup are where we expect
     # them to be. Because we have patched the APSystemsApiSystemSummaryDataUpdateCoordinator.async_get_data
     # call, no code from custom_components/apsystems_api/api.py actually runs.
-    assert await async_setup_entry(hass, config_entry)
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
     assert DOMAIN in hass.data and config_entry.entry_id in hass.data[DOMAIN]
     assert (
         type(hass.data[DOMAIN][config_entry.entry_id])
@@ -0,0 +1,123 @@
+"""Tests for the APSystems ECU LAN transport."""
+import asyncio
+import json
+import struct
+from unittest.mock import patch
+
+import pytest
+from custom_components.apsystems_api.api import APSystemsApiBase
+from custom_components.apsystems_api.api import APSystemsApiFleetClient
+from custom_components.apsystems_api.local import APSystemsApiLocalException
+from custom_components.apsystems_api.local import APSystemsApiLocalTransport
+from custom_components.apsystems_api.local import ECU_QUERY
+
+
+def _frame(ecu_id: str, lifetime: int, power: int, today: int) -> bytes:
+    body = b"0001" + ecu_id.encode() + b"01"
+    body += struct.pack(">III", lifetime, power, today) + b"\x00" * 9
+    return b"APS11" + b"%04d" % (len(body) + 9) + body + b"END\n"
+
+
+async def _ecu_server(frame: bytes):
+    """Stand-in for an ECU-R answering the summary query on a free port."""
+
+    async def handle(reader, writer):
+        if await reader.readuntil(b"END\n") == ECU_QUERY:
+            writer.write(frame)
+            await writer.drain()
+        writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    return server, server.sockets[0].getsockname()[1]
+
+
+def test_parse_hosts():
+    """Test parsing the configured ECU addresses."""
+    transports = APSystemsApiLocalTransport.parse_hosts("10.0.0.2, 10.0.0.3:9000")
+    assert [(t.host, t.port) for t in transports] == [
+        ("10.0.0.2", 8899),
+        ("10.0.0.3", 9000),
+    ]
+    assert APSystemsApiLocalTransport.parse_hosts(None) == []
+
+
+async def test_local_query():
+    """Test reading the ECU summary frame from a local server."""
+    server, port = await _ecu_server(_frame("216000012345", 123456, 1500, 1234))
+    async with server:
+        data = await APSystemsApiLocalTransport("127.0.0.1", port).async_query()
+
+    assert data == APSystemsApiLocalTransport.ECUData(
+        ecu_id="216000012345", lifetime=12345.6, power=1500.0, today=12.34
+    )
+
+    with pytest.raises(APSystemsApiLocalException):
+        APSystemsApiLocalTransport.parse_frame(b"XYZ")
+
+
+async def test_fleet_local_fallback():
+    """Test that ECUs read over the LAN skip the cloud and fall back to it."""
+    server, port = await _ecu_server(_frame("216000000001", 0, 800, 150))
+    client = APSystemsApiFleetClient(
+        "test",
+        "test",
+        {"s1": ["216000000001"]},
+        session=None,
+        local_transports=[APSystemsApiLocalTransport("127.0.0.1", port, timeout=1)],
+    )
+    cloud = []
+
+    async def system_summary(sid):
+        return APSystemsApiBase.SystemSummaryData(sid, "0", "0", "0")
+
+    async def ecu_minutely_energy(sid, ecu_id):
+        cloud.append(ecu_id)
+        return None
+
+    with patch.object(client, "system_summary", system_summary), patch.object(
+        client, "ecu_minutely_energy", ecu_minutely_energy
+    ):
+        async with server:
+            data = await client.async_get_data()
+            assert data.ecu_minutely_energy["216000000001"].latest_power == 800.0
+            assert data.ecu_minutely_energy["216000000001"].today == 1.5
+            assert cloud == []
+            assert client.requests_per_refresh == 1
+
+        await server.wait_closed()
+        await client.async_get_data()
+
+    assert cloud == ["216000000001"]
+    assert client.requests_per_refresh == 2
+
+
+async def test_restore_keeps_local_readings_apart():
+    """Test that restored LAN readings do not seed the cloud day buffer."""
+    server, port = await _ecu_server(_frame("216000000001", 0, 800, 150))
+    other, other_port = await _ecu_server(_frame("216000000009", 0, 100, 10))
+    transports = [
+        APSystemsApiLocalTransport("127.0.0.1", port, timeout=1),
+        APSystemsApiLocalTransport("127.0.0.1", other_port, timeout=1),
+    ]
+    client = APSystemsApiFleetClient(
+        "test", "test", {"s1": ["216000000001"]}, None, local_transports=transports
+    )
+
+    async def system_summary(sid):
+        return APSystemsApiBase.SystemSummaryData(sid, "0", "0", "0")
+
+    with patch.object(client, "system_summary", system_summary):
+        async with server, other:
+            data = await client.async_get_data()
+
+    # An ECU only seen on the LAN does not lower the requests of the fleet.
+    assert client.local_ecus == {"216000000001", "216000000009"}
+    assert client.requests_per_refresh == 1
+
+    restored = APSystemsApiFleetClient(
+        "test", "test", {"s1": ["216000000001"]}, None, local_transports=transports
+    )
+    restored.restore(json.loads(json.dumps(data.as_dict())))
+
+    assert "216000000001" in restored._local_buffers
+    assert "216000000001" not in restored._ecu_energy_buffers
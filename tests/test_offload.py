@@ -0,0 +1,72 @@
+"""Tests for the APSystems API work stage."""
+import asyncio
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from custom_components.apsystems_api.api import APSystemsApiBase
+from custom_components.apsystems_api.offload import APSystemsApiWorkStage
+from custom_components.apsystems_api.offload import (
+    APSystemsApiWorkStageClosedException,
+)
+from custom_components.apsystems_api.offload import OFFLOAD_MIN_BYTES
+
+from .test_api_payloads import MockResponse
+from .test_api_payloads import MockSession
+
+
+async def test_work_stage_bounds_and_cancels():
+    """Test that jobs queue up to the bound and close cancels waiting ones."""
+    release = threading.Event()
+    running = []
+
+    def job(value):
+        running.append(value)
+        release.wait(5)
+        return value
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        work = APSystemsApiWorkStage(executor, max_pending=2)
+        tasks = [asyncio.create_task(work.run(job, value)) for value in range(3)]
+        await asyncio.sleep(0.1)
+        assert sorted(running) == [0, 1]
+
+        work.close()
+        release.set()
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+
+    assert all(
+        isinstance(result, APSystemsApiWorkStageClosedException) for result in results
+    )
+    assert sorted(running) == [0, 1]
+    with pytest.raises(APSystemsApiWorkStageClosedException):
+        await work.run(job, 3)
+
+
+async def test_large_reply_is_decoded_off_loop():
+    """Test that large replies are decoded and parsed in the work stage."""
+    loop_thread = threading.get_ident()
+    threads = []
+
+    def parse(data):
+        threads.append(threading.get_ident())
+        return APSystemsApiBase.InverterTelemetryData.from_payload("2023-06-01", data)
+
+    power = {f"{uid}-1": [100] * 288 for uid in range(100)}
+    times = [f"{minute // 60:02}:{minute % 60:02}" for minute in range(0, 1440, 5)]
+    body = json.dumps({"code": 0, "data": {"time": times, "power": power}}).encode()
+    assert len(body) >= OFFLOAD_MIN_BYTES
+
+    api = APSystemsApiBase(
+        "test",
+        "test",
+        "sid",
+        "ecu",
+        MockSession(MockResponse(body)),
+        work=APSystemsApiWorkStage(),
+    )
+    data = await api._get_data("test", "/path", parse=parse, offload_parse=True)
+
+    assert data.latest_power("5") == 100.0
+    assert threads and threads[0] != loop_thread
@@ -0,0 +1,64 @@
+"""Tests for the APSystems API polling schedule."""
+from datetime import datetime
+from datetime import timedelta
+from datetime import timezone
+
+from custom_components.apsystems_api.scheduler import APSystemsApiPollScheduler
+from custom_components.apsystems_api.scheduler import FAST_INTERVAL
+from custom_components.apsystems_api.scheduler import FLAT_INTERVAL
+from custom_components.apsystems_api.scheduler import LOCAL_INTERVAL
+from custom_components.apsystems_api.scheduler import MAX_INTERVAL
+
+DAY = datetime(2023, 6, 1, tzinfo=timezone.utc)
+SUNRISE = DAY.replace(hour=5)
+SUNSET = DAY.replace(hour=21)
+NEXT_SUNRISE = SUNRISE + timedelta(days=1)
+
+
+def test_poll_fast_during_production():
+    """Test fast polling while output changes and slow polling when flat."""
+    scheduler = APSystemsApiPollScheduler(daily_request_budget=10000)
+    now = DAY.replace(hour=12)
+
+    for power in (100, 200, 300, 400):
+        scheduler.record(now, 2, power)
+    assert scheduler.next_interval(now, SUNRISE, SUNSET, NEXT_SUNRISE, 2) == (
+        FAST_INTERVAL
+    )
+
+    for _ in range(4):
+        scheduler.record(now, 2, 400)
+    assert scheduler.next_interval(now, SUNRISE, SUNSET, NEXT_SUNRISE, 2) == (
+        FLAT_INTERVAL
+    )
+
+
+def test_poll_local_ecu():
+    """Test sub-minute polling when production is read over the LAN."""
+    scheduler = APSystemsApiPollScheduler(daily_request_budget=100000)
+    now = DAY.replace(hour=12)
+
+    assert scheduler.next_interval(
+        now, SUNRISE, SUNSET, NEXT_SUNRISE, 1, local=True
+    ) == LOCAL_INTERVAL
+
+
+def test_poll_slow_at_night():
+    """Test that polling backs off until the next sunrise."""
+    scheduler = APSystemsApiPollScheduler()
+    now = DAY.replace(hour=22)
+
+    assert scheduler.next_interval(now, SUNRISE, SUNSET, NEXT_SUNRISE, 2) == (
+        MAX_INTERVAL
+    )
+
+
+def test_poll_within_budget():
+    """Test that the interval stretches to fit the daily request budget."""
+    scheduler = APSystemsApiPollScheduler(daily_request_budget=30)
+    now = DAY.replace(hour=12)
+    scheduler.record(now, 3, 0)
+
+    interval = scheduler.next_interval(now, SUNRISE, SUNSET, NEXT_SUNRISE, 3)
+    assert interval > FAST_INTERVAL
+    assert (SUNSET - now) / interval <= 9
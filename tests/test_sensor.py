@@ -0,0 +1,64 @@
+"""Tests for the APSystems API sensor platform."""
+from custom_components.apsystems_api.const import DOMAIN
+from custom_components.apsystems_api.sensor import _async_migrate_legacy_entities
+from homeassistant.helpers import device_registry as dr
+from homeassistant.helpers import entity_registry as er
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from .const import MOCK_CONFIG
+
+
+async def test_migrate_legacy_entities(hass):
+    """Test that sensors of earlier versions keep their entity ids."""
+    config_entry = MockConfigEntry(domain=DOMAIN, data=MOCK_CONFIG, entry_id="test")
+    config_entry.add_to_hass(hass)
+    device_registry = dr.async_get(hass)
+    entity_registry = er.async_get(hass)
+    device = device_registry.async_get_or_create(
+        config_entry_id=config_entry.entry_id,
+        identifiers={(DOMAIN, "None_apsystems_api_sensor_today")},
+    )
+    today = entity_registry.async_get_or_create(
+        "sensor",
+        DOMAIN,
+        "None_apsystems_api_sensor_today",
+        config_entry=config_entry,
+        device_id=device.id,
+        suggested_object_id="apsystems_api_sensor_today",
+    )
+    power = entity_registry.async_get_or_create(
+        "sensor",
+        DOMAIN,
+        "None_apsystems_api_sensor_latest_power",
+        config_entry=config_entry,
+        suggested_object_id="apsystems_api_sensor_latest_power",
+    )
+
+    await _async_migrate_legacy_entities(hass, config_entry, {"s1": ["e1"]})
+
+    today = entity_registry.async_get(today.entity_id)
+    assert today.unique_id == "None_apsystems_api_sensor_s1_today"
+    assert today.device_id is None
+    power = entity_registry.async_get(power.entity_id)
+    assert power.unique_id == "None_apsystems_api_sensor_e1_latest_power"
+    assert device_registry.async_get(device.id) is None
+
+
+async def test_migrate_skips_fleets(hass):
+    """Test that entries with several ECUs are left alone."""
+    config_entry = MockConfigEntry(domain=DOMAIN, data=MOCK_CONFIG, entry_id="test")
+    config_entry.add_to_hass(hass)
+    entity_registry = er.async_get(hass)
+    today = entity_registry.async_get_or_create(
+        "sensor",
+        DOMAIN,
+        "None_apsystems_api_sensor_today",
+        config_entry=config_entry,
+    )
+
+    await _async_migrate_legacy_entities(hass, config_entry, {"s1": ["e1", "e2"]})
+
+    assert (
+        entity_registry.async_get(today.entity_id).unique_id
+        == "None_apsystems_api_sensor_today"
+    )
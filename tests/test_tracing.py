@@ -0,0 +1,43 @@
+"""Tests for APSystems API tracing."""
+import logging
+
+from custom_components.apsystems_api.tracing import trace
+from custom_components.apsystems_api.tracing import trace_enabled
+
+
+class Counted:
+    """Counts how often it is formatted."""
+
+    calls = 0
+
+    def __repr__(self):
+        Counted.calls += 1
+        return "counted"
+
+
+def test_trace_is_free_when_disabled():
+    """Test that fields are only formatted when debug records are emitted."""
+    logger = logging.getLogger("custom_components.apsystems_api")
+    records = []
+    handler = logging.Handler()
+    handler.emit = records.append
+    logger.addHandler(handler)
+    # Keep the records away from handlers of the root logger, such as pytest's
+    # log capture, which would format them too.
+    logger.propagate = False
+    try:
+        logger.setLevel(logging.INFO)
+        assert not trace_enabled()
+        trace("event", value=Counted())
+        assert records == []
+        assert Counted.calls == 0
+
+        logger.setLevel(logging.DEBUG)
+        assert trace_enabled()
+        trace("event", value=Counted(), revision=3)
+        assert records[0].getMessage() == "event value=counted revision=3"
+        assert Counted.calls == 1
+    finally:
+        logger.removeHandler(handler)
+        logger.setLevel(logging.NOTSET)
+        logger.propagate = True